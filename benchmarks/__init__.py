@@ -0,0 +1 @@
+# 模拟、汇总和页面渲染的基准测试（python -m benchmarks --help）
@@ -0,0 +1,169 @@
+# 基准用例：模拟、汇总和页面渲染在不同规模下的表现
+# 规模以“买家轮次”（买家数 × 轮次数）和房源目录大小衡量，分为三档：
+#   smoke   10^2 - 10^4 买家轮次，目录 10 - 10^3      （几秒钟，适合每次提交）
+#   default 10^2 - 10^6 买家轮次，目录 10 - 10^5
+#   full    10^2 - 10^7 买家轮次，目录 10 - 10^6
+import numpy as np
+
+from benchmarks.harness import Case
+from house_sim import (
+    HOUSES, Catalog, create_catalog, round_budgets, run_simulation,
+    run_simulation_streaming, simulate_buyer,
+)
+
+TIERS = {
+    'smoke': {'buyer_rounds': [10 ** 2, 10 ** 3, 10 ** 4], 'houses': [10, 10 ** 3],
+              'rounds': [3, 10], 'page_buyers': [10, 10 ** 4], 'repeats': 3},
+    'default': {'buyer_rounds': [10 ** e for e in range(2, 7)], 'houses': [10, 10 ** 3, 10 ** 5],
+                'rounds': [3, 10, 30], 'page_buyers': [10, 10 ** 3, 10 ** 5], 'repeats': 5},
+    'full': {'buyer_rounds': [10 ** e for e in range(2, 8)], 'houses': [10 ** e for e in range(1, 7)],
+             'rounds': [3, 10, 30], 'page_buyers': [10, 10 ** 3, 10 ** 5, 10 ** 6], 'repeats': 5},
+}
+
+# simulate_buyer 每次只模拟一个买家，按固定调用次数测单次延迟
+SINGLE_BUYER_CALLS = 200
+# 页面完整渲染（含逐买家表格）的最大买家数；更多买家时只渲染按轮次汇总的图表
+# 买家行为总结已分页渲染，上限只受其余逐买家表格（选择模式、预算使用率）整表发送的限制
+PAGE_FULL_MAX_BUYERS = 10 ** 5
+SEED = 12345
+
+
+# 任意大小的合成房源目录；不超过示例数据大小时直接使用示例房源
+def synthetic_catalog(num_houses, seed=0):
+    if num_houses <= len(HOUSES):
+        return create_catalog(num_houses)
+    rng = np.random.default_rng(seed)
+    price = rng.integers(80, 161, num_houses)
+    house_type = np.where(np.arange(num_houses) % 2 == 0, 'Location', 'Property')
+    return Catalog({
+        'id': np.arange(1, num_houses + 1),
+        'price': price,
+        'tier': np.where(price < 110, 'Value', np.where(price < 135, 'Median', 'Premium')),
+        'type': house_type,
+        'features': np.full(num_houses, '', dtype=object),
+        'benchmark': np.where(house_type == 'Location', price - 5, np.nan),
+    })
+
+
+def _catalog_columns(num_houses):
+    catalog = synthetic_catalog(num_houses)
+    return {name: np.asarray(catalog[name][:]) for name in ('id', 'price', 'tier', 'type')}
+
+
+def catalog_cases(tier):
+    for houses in tier['houses']:
+        yield Case('catalog.build', {'houses': houses},
+                   run=Catalog, setup=lambda houses=houses: _catalog_columns(houses),
+                   units=houses, unit='house', repeats=tier['repeats'])
+
+
+def simulate_buyer_cases(tier):
+    for houses in tier['houses']:
+        catalog = synthetic_catalog(houses)
+
+        def run(rng, catalog=catalog):
+            for _ in range(SINGLE_BUYER_CALLS):
+                simulate_buyer(catalog, 1, 100, rng)
+
+        yield Case('engine.simulate_buyer', {'houses': houses}, run=run,
+                   setup=lambda: np.random.default_rng(SEED), units=SINGLE_BUYER_CALLS,
+                   unit='buyer-round', repeats=tier['repeats'])
+
+
+def run_simulation_cases(tier):
+    for houses in tier['houses']:
+        catalog = synthetic_catalog(houses)
+        for buyer_rounds in tier['buyer_rounds']:
+            budgets = round_budgets(3)
+            num_buyers = max(buyer_rounds // len(budgets), 1)
+            yield Case('engine.run_simulation', {'buyer_rounds': buyer_rounds, 'houses': houses, 'rounds': 3},
+                       run=lambda _, catalog=catalog, num_buyers=num_buyers, budgets=budgets:
+                       run_simulation(catalog, num_buyers, seed=SEED, budgets=budgets),
+                       units=num_buyers * len(budgets), unit='buyer-round', repeats=tier['repeats'])
+
+    # 轮次增加、买家轮次总数不变
+    catalog = synthetic_catalog(10)
+    buyer_rounds = tier['buyer_rounds'][-2]
+    for rounds in tier['rounds']:
+        if rounds == 3 and 10 in tier['houses']:
+            continue
+        budgets = round_budgets(rounds)
+        num_buyers = max(buyer_rounds // rounds, 1)
+        yield Case('engine.run_simulation', {'buyer_rounds': buyer_rounds, 'houses': 10, 'rounds': rounds},
+                   run=lambda _, num_buyers=num_buyers, budgets=budgets:
+                   run_simulation(catalog, num_buyers, seed=SEED, budgets=budgets),
+                   units=num_buyers * rounds, unit='buyer-round', repeats=tier['repeats'])
+
+
+def aggregation_cases(tier):
+    from house_sim import aggregate
+
+    catalog = synthetic_catalog(10)
+    for buyer_rounds in tier['buyer_rounds']:
+        num_buyers = max(buyer_rounds // 3, 1)
+        params = {'buyer_rounds': buyer_rounds}
+        yield Case('aggregate.streaming_run', params,
+                   run=lambda _, num_buyers=num_buyers: run_simulation_streaming(catalog, num_buyers, seed=SEED),
+                   units=num_buyers * 3, unit='buyer-round', repeats=tier['repeats'])
+
+        def tables(results):
+            aggregate.tier_counts(results)
+            aggregate.type_counts(results)
+            aggregate.budget_utilization(results)
+            aggregate.preference_pct(results, 'tier')
+            aggregate.price_trend(results)
+            aggregate.buyer_summary(results)
+
+        yield Case('aggregate.frame_tables', params, run=tables,
+                   setup=lambda num_buyers=num_buyers: run_simulation(catalog, num_buyers, seed=SEED),
+                   units=num_buyers * 3, unit='buyer-round', repeats=tier['repeats'])
+
+        def summaries(results):
+            results.tier_counts()
+            results.type_counts()
+            results.price_stats()
+            results.budget_utilization()
+            results.preference_pct('tier')
+            results.price_trend()
+            results.buyer_summary()
+
+        yield Case('aggregate.streaming_tables', params, run=summaries,
+                   setup=lambda num_buyers=num_buyers: run_simulation_streaming(catalog, num_buyers, seed=SEED),
+                   units=num_buyers * 3, unit='buyer-round', repeats=tier['repeats'])
+
+
+def page_cases(tier):
+    from benchmarks import pages
+
+    for num_buyers in tier['page_buyers']:
+        results = run_simulation_streaming(synthetic_catalog(10), num_buyers, seed=SEED)
+        full = num_buyers <= PAGE_FULL_MAX_BUYERS
+        params = {'buyers': num_buyers, 'full': full}
+        # 冷启动：清空图表缓存，结果指纹需要重新计算
+        yield Case('page.show_simulation_results.cold', params,
+                   setup=lambda results=results, full=full: pages.results_app(results, full, cold=True),
+                   run=pages.run_app, units=num_buyers * 3, unit='buyer-round', repeats=tier['repeats'])
+        # 热重跑：数据没有变化，图表直接来自缓存
+        yield Case('page.show_simulation_results.warm', params,
+                   setup=lambda results=results, full=full: pages.results_app(results, full, cold=False),
+                   run=pages.run_app, units=num_buyers * 3, unit='buyer-round', repeats=tier['repeats'])
+
+    yield Case('page.experiment.display_houses', {'rounds': 3}, setup=pages.experiment_app,
+               run=pages.play_experiment, units=pages.EXPERIMENT_INTERACTIONS, unit='interaction',
+               repeats=tier['repeats'], context=pages.isolated_events)
+
+
+GROUPS = {
+    'catalog': catalog_cases,
+    'simulate_buyer': simulate_buyer_cases,
+    'run_simulation': run_simulation_cases,
+    'aggregate': aggregation_cases,
+    'page': page_cases,
+}
+
+
+def build_cases(tier_name, groups=None):
+    tier = TIERS[tier_name]
+    for name, factory in GROUPS.items():
+        if groups is None or name in groups:
+            yield from factory(tier)
@@ -0,0 +1,150 @@
+# 基准测试的计时、内存测量和基线比较
+# 每个用例先重复计时（不开 tracemalloc，避免影响耗时），再单独运行一次测量峰值内存
+import contextlib
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+# 与基线相比中位耗时变慢超过该比例即视为回归
+DEFAULT_THRESHOLD = 1.25
+LATENCY_PERCENTILES = (50, 90, 99)
+
+
+# 一个基准用例：setup() 返回传给 run() 的参数（不计时），run(state) 是被计时的部分
+# units 为一次 run 处理的工作量（买家轮次、交互次数等），用于计算吞吐量
+# run 可以返回每次操作的耗时列表 (list)（例如页面上的每次点击），结果中会额外给出这些耗时的分位数
+# context() 返回包住整个用例（所有 setup 和 run）的上下文管理器，不计时
+class Case:
+    def __init__(self, name, params, run, setup=None, units=1, unit='op', repeats=5, measure_memory=True,
+                 context=None):
+        self.name = name
+        self.params = params
+        self.run = run
+        self.setup = setup
+        self.context = context
+        self.units = units
+        self.unit = unit
+        self.repeats = repeats
+        self.measure_memory = measure_memory
+
+    @property
+    def key(self):
+        return self.name + '[' + ','.join(f'{name}={value}' for name, value in sorted(self.params.items())) + ']'
+
+
+def _percentiles(seconds):
+    return {
+        'min': float(seconds.min()),
+        'mean': float(seconds.mean()),
+        **{f'p{p}': float(np.percentile(seconds, p)) for p in LATENCY_PERCENTILES},
+    }
+
+
+def _prepare(case):
+    return case.setup() if case.setup is not None else None
+
+
+# 运行一个用例，返回可写入 JSON 的结果字典
+def measure(case):
+    with case.context() if case.context is not None else contextlib.nullcontext():
+        return _measure(case)
+
+
+def _measure(case):
+    durations = []
+    samples = []
+    for _ in range(case.repeats):
+        state = _prepare(case)
+        start = time.perf_counter()
+        latencies = case.run(state)
+        durations.append(time.perf_counter() - start)
+        if isinstance(latencies, list):
+            samples.extend(latencies)
+        del state
+    durations = np.array(durations)
+
+    peak = None
+    if case.measure_memory:
+        state = _prepare(case)
+        tracemalloc.start()
+        try:
+            case.run(state)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del state
+
+    median = float(np.median(durations))
+    result = {
+        'key': case.key,
+        'name': case.name,
+        'params': case.params,
+        'units': case.units,
+        'unit': case.unit,
+        'repeats': case.repeats,
+        'seconds': _percentiles(durations),
+        'throughput': case.units / median if median > 0 else None,
+        'peak_bytes': peak,
+    }
+    if samples:
+        result['latency'] = _percentiles(np.array(samples))
+    return result
+
+
+def environment():
+    import pandas as pd
+
+    return {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def save(path, tier, results):
+    with open(path, 'w') as f:
+        json.dump({'tier': tier, 'environment': environment(), 'results': results}, f, indent=2)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# 与基线比较中位耗时，返回 (用例键, 基线耗时, 当前耗时, 比值, 是否回归) 列表
+def compare(baseline, results, threshold=DEFAULT_THRESHOLD):
+    previous = {result['key']: result for result in baseline['results']}
+    rows = []
+    for result in results:
+        before = previous.get(result['key'])
+        if before is None:
+            continue
+        old, new = before['seconds']['p50'], result['seconds']['p50']
+        ratio = new / old if old > 0 else float('inf')
+        rows.append((result['key'], old, new, ratio, ratio > threshold))
+    return rows
+
+
+def format_bytes(value):
+    if value is None:
+        return '-'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if value < 1024 or unit == 'GiB':
+            return f'{value:.0f} {unit}' if unit == 'B' else f'{value:.1f} {unit}'
+        value /= 1024
+
+
+def format_result(result):
+    seconds = result.get('latency', result['seconds'])
+    throughput = result['throughput']
+    rate = f"{throughput:,.0f} {result['unit']}/s" if throughput is not None else '-'
+    return (f"{result['key']:<70} p50 {seconds['p50'] * 1000:9.2f} ms  p90 {seconds['p90'] * 1000:9.2f} ms  "
+            f"p99 {seconds['p99'] * 1000:9.2f} ms  {rate:>24}  peak {format_bytes(result['peak_bytes'])}")
@@ -0,0 +1,223 @@
+# 实验页的多参与者并发压测：N 个脚本化的参与者同时走完三轮实验
+#   python -m benchmarks.load --participants 1 10 50
+#   python -m benchmarks.load --participants 100 200 --processes 16 --think-time 0.5 --output load.json
+#
+# 默认每个参与者在自己的进程中运行，所有会话真正同时进行，并共用同一个（临时的）事件库，
+# 压测的是多个服务进程并发追加事件时的争用。各进程先走一遍不计入结果的热身会话，再在屏障处一起开始。
+# AppTest 不是线程安全的：每次运行都会安装并在结束时清除进程全局的模拟 Runtime，
+# 因此同一进程内的脚本运行由一把锁串行化。用 --processes 限制进程数（例如内存不够时）时，
+# 同一进程中的参与者轮流运行，延迟 (latency) 中包括排队时间，run 是实际运行时间
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.harness import environment
+from benchmarks.pages import EXPERIMENT_PAGE, TIMEOUT, isolated_events
+from house_sim.events import replay
+
+# 参与者行为：查看 benchmark 和尝试购买当前房源的概率
+VIEW_BENCHMARK = 0.5
+PURCHASE = 0.3
+
+# 各进程的计时会话在这个屏障处同时开始（多进程时由 _start_together 设置）
+START_TIMEOUT = 600
+
+_RUN_LOCK = threading.Lock()
+_start = None
+
+
+def _start_together(barrier):
+    global _start
+    _start = barrier
+
+
+def _page_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# 一个脚本化的参与者；记录每次重跑的总延迟（含排队）和实际运行时间
+class Participant:
+    def __init__(self, participant_id, seed=0, think_time=0.0):
+        self.id = participant_id
+        self.rng = np.random.default_rng([seed, participant_id + 1])
+        self.think_time = think_time
+        self.latencies = []
+        self.service = []
+        self.app = None
+
+    def _run(self):
+        requested = time.perf_counter()
+        with _RUN_LOCK:
+            started = time.perf_counter()
+            self.app.run()
+        finished = time.perf_counter()
+        self.latencies.append(finished - requested)
+        self.service.append(finished - started)
+        if self.app.exception:
+            raise RuntimeError(f"participant {self.id}: {self.app.exception[0].value}")
+
+    def _think(self):
+        if self.think_time > 0:
+            time.sleep(self.rng.exponential(self.think_time))
+
+    def _button(self, prefix, suffix=''):
+        for button in self.app.button:
+            if button.key and button.key.startswith(prefix) and button.key.endswith(suffix):
+                return button
+        return None
+
+    def click(self, button):
+        self._think()
+        button.click()
+        self._run()
+
+    # 走完整个实验：每个当前房源可能先查看 benchmark，再尝试购买或跳过
+    def play(self, rounds=3):
+        from streamlit.testing.v1 import AppTest
+
+        start = time.perf_counter()
+        self.app = AppTest.from_file(str(EXPERIMENT_PAGE), default_timeout=TIMEOUT)
+        self._run()
+        for round_num in range(1, rounds + 1):
+            while (skip := self._button('skip_')) is not None:
+                benchmark = self._button('benchmark_', '_True')
+                if benchmark is not None and self.rng.random() < VIEW_BENCHMARK:
+                    self.click(benchmark)
+                    continue
+                purchase = self._button('purchase_', '_True')
+                if purchase is not None and self.rng.random() < PURCHASE:
+                    self.click(purchase)
+                    if not self.app.error:
+                        continue
+                    skip = self._button('skip_')
+                self.click(skip)
+            self.click(self._button(f'next_round_{round_num}'))
+        return {
+            'seconds': time.perf_counter() - start,
+            'latencies': self.latencies,
+            'service': self.service,
+        }
+
+
+# 在当前进程中用线程运行一批参与者，返回各参与者的结果和内存增长
+# 事件写入调用方设置的 HOUSE_SIM_EVENTS（load_test 中为 isolated_events 的临时数据库）
+def run_participants(participant_ids, seed=0, think_time=0.0):
+    from house_sim.ui import event_log
+
+    # 先走一遍不计入结果的会话，让模块导入和首次运行的开销不计入延迟和内存
+    Participant(-1, seed).play()
+    rss_before = _page_rss()
+    participants = [Participant(i, seed, think_time) for i in participant_ids]
+    if _start is not None:
+        _start.wait(START_TIMEOUT)
+    # 用墙上时钟记录开始和结束时间，各进程的时间可以直接比较
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=max(len(participants), 1)) as pool:
+        sessions = list(pool.map(Participant.play, participants))
+    finished = time.time()
+    # 会话结束前 AppTest 仍然持有会话状态，在这里测量每个会话占用的内存
+    rss_after = _page_rss()
+    del participants
+    # 工作进程退出时不执行 atexit，先把事件写完
+    event_log().flush()
+    return sessions, rss_after - rss_before, (started, finished)
+
+
+def _stats(values):
+    values = np.asarray(values)
+    return {
+        'mean': float(values.mean()),
+        'p50': float(np.percentile(values, 50)),
+        'p90': float(np.percentile(values, 90)),
+        'p99': float(np.percentile(values, 99)),
+        'max': float(values.max()),
+    }
+
+
+# 以 num_participants 个并发参与者运行一次压测；processes 为 0 时每个参与者一个进程
+# 耗时从各进程热身完成、同时开始时算起
+def load_test(num_participants, processes=0, seed=0, think_time=0.0):
+    ids = list(range(num_participants))
+    processes = max(min(processes or num_participants, num_participants), 1)
+    # 父进程只负责调度，不运行 AppTest（脚本运行会替换 sys.modules['__main__']，之后无法再向进程池提交任务）
+    with isolated_events(close_log=False) as path:
+        context = multiprocessing.get_context()
+        chunks = [ids[i::processes] for i in range(processes)]
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_start_together,
+                                 initargs=(context.Barrier(processes),)) as pool:
+            parts = list(pool.map(run_participants, chunks, [seed] * processes, [think_time] * processes))
+        # 共用事件库中写入的事件数（包括各进程的热身会话）
+        events = sum(1 for _ in replay(path))
+    elapsed = max(finished for *_, (_, finished) in parts) - min(started for *_, (started, _) in parts)
+
+    sessions = [session for part, _, _ in parts for session in part]
+    latencies = [value for session in sessions for value in session['latencies']]
+    service = [value for session in sessions for value in session['service']]
+    rss = sum(rss for _, rss, _ in parts)
+    return {
+        'participants': num_participants,
+        'processes': processes,
+        'think_time': think_time,
+        'seconds': elapsed,
+        'reruns': len(latencies),
+        'reruns_per_second': len(latencies) / elapsed,
+        'sessions_per_minute': num_participants / elapsed * 60,
+        'events': events,
+        'latency': _stats(latencies),
+        'service': _stats(service),
+        'session_seconds': _stats([session['seconds'] for session in sessions]),
+        'rss_per_session': rss / max(num_participants, 1),
+    }
+
+
+def format_result(result):
+    latency = result['latency']
+    return (f"{result['participants']:>5} participants  {result['processes']:>4} processes  "
+            f"{result['reruns']:>6} reruns  "
+            f"{result['reruns_per_second']:8.1f} reruns/s  "
+            f"latency p50 {latency['p50'] * 1000:8.1f} ms  p90 {latency['p90'] * 1000:8.1f} ms  "
+            f"p99 {latency['p99'] * 1000:8.1f} ms  run p50 {result['service']['p50'] * 1000:6.1f} ms  "
+            f"{result['rss_per_session'] / 2 ** 20:6.2f} MiB/session")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='benchmarks.load', description='Drive scripted participants '
+                                     'concurrently through the Experiment page with AppTest.')
+    parser.add_argument('--participants', type=int, nargs='+', default=[1, 10, 50],
+                        help='numbers of concurrent participants to test')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='worker processes to spread participants over (0 = one per participant, so every '
+                             'session runs concurrently; participants sharing a process take turns)')
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help='mean seconds a participant waits between clicks (exponential)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for participant behaviour')
+    parser.add_argument('--output', help='write results to this JSON file')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = []
+    for num_participants in args.participants:
+        result = load_test(num_participants, args.processes, args.seed, args.think_time)
+        results.append(result)
+        print(format_result(result), flush=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
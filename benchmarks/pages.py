@@ -0,0 +1,112 @@
+# 页面级基准：用 streamlit.testing.v1.AppTest 无界面地运行页面脚本
+import contextlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from house_sim import StreamingAggregator
+
+ROOT = Path(__file__).resolve().parents[1]
+EXPERIMENT_PAGE = ROOT / 'pages' / '01_Experiment.py'
+TIMEOUT = 600
+
+# 实验页走完三轮：每轮跳过 8 个房源再点击 Next Round
+EXPERIMENT_ROUNDS = 3
+EXPERIMENT_HOUSES = 8
+EXPERIMENT_INTERACTIONS = EXPERIMENT_ROUNDS * (EXPERIMENT_HOUSES + 1)
+
+
+# AppTest 执行的脚本（函数体会被单独执行，必须自带导入）
+def _results_script(results, full):
+    from house_sim.ui import show_simulation_results
+
+    show_simulation_results(results, selection_patterns=full, behavior_analysis=full)
+
+
+# 渲染模拟结果的页面；cold 时清空图表、bootstrap 区间和买家行为总结的缓存并使用新的汇总器
+# （指纹需要重新计算），否则先运行一次让缓存生效
+def results_app(results, full, cold):
+    from streamlit.testing.v1 import AppTest
+
+    from house_sim.ui import cached_buyer_summary, cached_figures, cached_intervals
+
+    if cold:
+        cached_figures.clear()
+        cached_intervals.clear()
+        cached_buyer_summary.clear()
+        results = StreamingAggregator(results.catalog, results.budgets,
+                                      track_buyers=results.track_buyers).merge(results)
+    app = AppTest.from_function(_results_script, default_timeout=TIMEOUT,
+                                kwargs={'results': results, 'full': full})
+    if not cold:
+        run_app(app)
+    return app
+
+
+def run_app(app):
+    app.run()
+    _raise_exception(app)
+
+
+def _raise_exception(app):
+    if app.exception:
+        raise RuntimeError(f"page raised: {app.exception[0].value}")
+
+
+def _button(app, label):
+    for button in app.button:
+        if button.label == label:
+            return button
+    raise RuntimeError(f"button {label!r} not found")
+
+
+# 把实验页的事件日志指向临时数据库，脚本化参与者的会话不会写入真实的实验数据
+# （参与者对比页和事件导出读取的 HOUSE_SIM_EVENTS / experiment_events.sqlite）；退出时关闭日志并删除临时文件
+# 页面只在子进程中运行时（压测），本进程没有事件日志需要关闭，close_log 传 False
+@contextlib.contextmanager
+def isolated_events(close_log=True):
+    from house_sim.events import EVENTS_ENV
+    from house_sim.ui import event_log
+
+    previous = os.environ.get(EVENTS_ENV)
+    with tempfile.TemporaryDirectory(prefix='house-sim-events-') as directory:
+        os.environ[EVENTS_ENV] = os.path.join(directory, 'events.sqlite')
+        # 进程内共享的日志可能已经指向真实的事件库，重新创建
+        event_log.clear()
+        try:
+            yield os.environ[EVENTS_ENV]
+        finally:
+            if close_log:
+                event_log().close()
+            event_log.clear()
+            if previous is None:
+                del os.environ[EVENTS_ENV]
+            else:
+                os.environ[EVENTS_ENV] = previous
+
+
+# 打开实验页（第一次运行不计时）；需要在 isolated_events() 中使用
+def experiment_app():
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(EXPERIMENT_PAGE), default_timeout=TIMEOUT)
+    run_app(app)
+    return app
+
+
+# 模拟一个参与者走完整个实验，返回每次点击（含页面重跑）的耗时
+def play_experiment(app):
+    latencies = []
+
+    def click(label):
+        start = time.perf_counter()
+        _button(app, label).click().run()
+        latencies.append(time.perf_counter() - start)
+        _raise_exception(app)
+
+    for _ in range(EXPERIMENT_ROUNDS):
+        for _ in range(EXPERIMENT_HOUSES):
+            click("Skip Current House")
+        click("Next Round")
+    return latencies
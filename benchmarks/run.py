@@ -0,0 +1,60 @@
+# 基准测试入口：
+#   python -m benchmarks --tier smoke --output baseline.json
+#   python -m benchmarks --tier smoke --compare baseline.json     # 中位耗时变慢超过阈值时返回 1
+import argparse
+import fnmatch
+import sys
+
+from benchmarks.cases import GROUPS, TIERS, build_cases
+from benchmarks.harness import DEFAULT_THRESHOLD, compare, format_result, load, measure, save
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='benchmarks', description='Benchmark simulation, aggregation and page '
+                                                                    'rendering at increasing scale.')
+    parser.add_argument('--tier', choices=list(TIERS), default='smoke', help='scale tier to run')
+    parser.add_argument('--group', action='append', choices=list(GROUPS),
+                        help='only run these benchmark groups (repeatable)')
+    parser.add_argument('--filter', help='only run cases whose key matches this glob pattern')
+    parser.add_argument('--repeats', type=int, help='override the number of timed repetitions')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak-memory run of each case')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare against a baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='median slowdown ratio that counts as a regression')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    results = []
+    for case in build_cases(args.tier, args.group):
+        if args.filter and not fnmatch.fnmatch(case.key, args.filter):
+            continue
+        if args.repeats:
+            case.repeats = args.repeats
+        if args.no_memory:
+            case.measure_memory = False
+        result = measure(case)
+        results.append(result)
+        print(format_result(result), flush=True)
+
+    if args.output:
+        save(args.output, args.tier, results)
+
+    if args.compare:
+        rows = compare(load(args.compare), results, args.threshold)
+        regressions = [row for row in rows if row[4]]
+        print(f"\nCompared {len(rows)} cases with {args.compare}")
+        for key, old, new, ratio, regressed in rows:
+            flag = 'REGRESSION' if regressed else ''
+            print(f"{key:<70} {old * 1000:9.2f} ms -> {new * 1000:9.2f} ms  x{ratio:5.2f}  {flag}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above x{args.threshold}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+from house_sim.catalog import (
+    DEFAULT_NUM_HOUSES,
+    HOUSES,
+    Catalog,
+    as_catalog,
+    create_catalog,
+    create_house_data,
+)
+from house_sim.compare import VariantComparison, compare_variants
+from house_sim.convergence import ConvergenceResult, run_until_converged
+from house_sim.engine import (
+    BLOCK_SIZE,
+    ROUND_BUDGETS,
+    SAMPLE_SIZE,
+    decide_buyers,
+    plan_blocks,
+    round_budgets,
+    run_simulation,
+    simulate_block,
+    simulate_buyer,
+)
+from house_sim.jobs import JobManager, SimulationJob
+from house_sim.parallel import iter_blocks, run_simulation_parallel
+from house_sim.policies import POLICIES, Policy, PolicyMix, get_policy
+from house_sim.sampling import sample_without_replacement, shuffled_order
+from house_sim.stateful import StatefulResult, run_stateful_simulation
+from house_sim.store import load_catalog, open_catalog, write_catalog
+from house_sim.streaming import QuantileSketch, StreamingAggregator, run_simulation_streaming
+from house_sim.sweep import ResultCache, sweep
+
+
+# events 在第一次访问 EventLog 时才导入：python -m house_sim.events 导入包时模块还没有加载，
+# runpy 不会因为模块已在 sys.modules 中而发出警告
+def __getattr__(name):
+    if name == 'EventLog':
+        from house_sim.events import EventLog
+
+        return EventLog
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "BLOCK_SIZE",
+    "Catalog",
+    "ConvergenceResult",
+    "DEFAULT_NUM_HOUSES",
+    "EventLog",
+    "HOUSES",
+    "JobManager",
+    "POLICIES",
+    "Policy",
+    "PolicyMix",
+    "QuantileSketch",
+    "ROUND_BUDGETS",
+    "ResultCache",
+    "SAMPLE_SIZE",
+    "SimulationJob",
+    "StatefulResult",
+    "StreamingAggregator",
+    "VariantComparison",
+    "as_catalog",
+    "compare_variants",
+    "create_catalog",
+    "create_house_data",
+    "decide_buyers",
+    "get_policy",
+    "iter_blocks",
+    "load_catalog",
+    "open_catalog",
+    "plan_blocks",
+    "round_budgets",
+    "run_simulation",
+    "run_simulation_parallel",
+    "run_simulation_streaming",
+    "run_stateful_simulation",
+    "run_until_converged",
+    "sample_without_replacement",
+    "shuffled_order",
+    "simulate_block",
+    "simulate_buyer",
+    "sweep",
+    "write_catalog",
+]
@@ -0,0 +1,5 @@
+import sys
+
+from house_sim.cli import main
+
+sys.exit(main())
@@ -0,0 +1,80 @@
+# 模拟结果的统计汇总（供模拟页和命令行共用，不依赖 Streamlit）
+# tier/type 是分类列，分组时只保留实际出现的类别 (observed=True)
+import pandas as pd
+
+from house_sim.engine import ROUND_BUDGETS
+from house_sim.profiling import timed
+
+
+# 各轮次的层级分布
+@timed('groupby.tier_counts')
+def tier_counts(results_df):
+    return results_df.groupby(['round', 'tier'], observed=True).size().unstack(fill_value=0)
+
+
+# 各轮次的类型分布
+@timed('groupby.type_counts')
+def type_counts(results_df):
+    return results_df.groupby(['round', 'type'], observed=True).size().unstack(fill_value=0)
+
+
+# 买家选择模式：每个买家每轮的选择
+@timed('groupby.buyer_patterns')
+def buyer_patterns(results_df):
+    return results_df.pivot_table(
+        index='buyer',
+        columns='round',
+        values=['price', 'tier', 'type'],
+        aggfunc='first',
+        observed=True
+    ).reset_index()
+
+
+# 买家预算使用率
+@timed('groupby.budget_utilization')
+def budget_utilization(results_df, budgets=None):
+    budgets = ROUND_BUDGETS if budgets is None else budgets
+    utilization = results_df.groupby(['buyer', 'round'], observed=True).agg({
+        'price': ['sum', 'mean']
+    }).reset_index()
+    utilization.columns = ['Buyer', 'Round', 'Total Spent', 'Average Price']
+    utilization['Budget'] = utilization['Round'].map(budgets)
+    utilization['Utilization Rate'] = (utilization['Total Spent'] / utilization['Budget'] * 100).round(1)
+    return utilization
+
+
+# 每个买家选择某类型/层级的百分比
+@timed('groupby.preference_pct')
+def preference_pct(results_df, column):
+    counts = results_df.groupby(['buyer', column], observed=True).size().unstack(fill_value=0)
+    return counts.div(counts.sum(axis=1), axis=0) * 100
+
+
+# 每个买家各轮的平均成交价
+@timed('groupby.price_trend')
+def price_trend(results_df):
+    return results_df.groupby(['buyer', 'round'], observed=True)['price'].mean().reset_index()
+
+
+# 每个买家选择最多的类别（次数相同时取排序靠前的类别，与 mode() 一致），一次分组完成
+def _modal(results_df, column, buyers):
+    counts = results_df.groupby(['buyer', column], observed=True).size().reset_index(name='count')
+    counts = counts.sort_values('count', ascending=False, kind='stable').drop_duplicates('buyer')
+    return counts.set_index('buyer')[column].reindex(buyers).to_numpy()
+
+
+# 每个买家的行为总结（按买家首次出现的顺序）
+@timed('groupby.buyer_summary')
+def buyer_summary(results_df):
+    buyers = results_df['buyer'].unique()
+    # 紧凑的 int16 价格先转为 int64 再求和，避免溢出
+    price = results_df['price']
+    price = price.astype('int64' if pd.api.types.is_integer_dtype(price) else 'float64')
+    price = price.groupby(results_df['buyer']).agg(['sum', 'mean']).reindex(buyers)
+    return pd.DataFrame({
+        'buyer': buyers,
+        'total_spent': price['sum'].to_numpy(),
+        'avg_price': price['mean'].to_numpy(),
+        'preferred_type': _modal(results_df, 'type', buyers),
+        'preferred_tier': _modal(results_df, 'tier', buyers),
+    }, columns=['buyer', 'total_spent', 'avg_price', 'preferred_type', 'preferred_tier'])
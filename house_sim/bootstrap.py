@@ -0,0 +1,120 @@
+# 向量化 bootstrap：以买家为重抽样单位，一次为 B 个重复样本抽取重抽样权重，
+# 各统计量由 (B × 买家) 权重矩阵与 (买家 × 指标) 矩阵的乘积得到，不逐个样本重算 pandas 分组
+# 指标完全相同的买家先合并为一组（模拟中不同的买家画像通常远少于买家数），每组的重抽样次数直接按
+# 多项分布 / 泊松分布抽取，与逐个买家抽取的分布完全相同；组很多时按组分块，权重矩阵最多占 B × 块大小
+import numpy as np
+
+from house_sim.convergence import CONFIDENCE
+from house_sim.profiling import stage
+
+REPLICATES = 1000
+METHODS = ('multinomial', 'poisson')
+# 每块权重矩阵的元素数上限
+CHUNK_ELEMENTS = 1 << 22
+
+
+# 合并完全相同的行，返回 (不同的行, 每行出现的次数)
+def compress_rows(columns):
+    columns = np.ascontiguousarray(columns, dtype=np.float64)
+    if len(columns) == 0:
+        return columns, np.zeros(0, dtype=np.int64)
+    keys = columns.view(np.dtype((np.void, columns.itemsize * columns.shape[1]))).ravel()
+    _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    return columns[first], counts
+
+
+# 逐块产出 (组的范围, (B × 组) 的重抽样次数)
+#   multinomial  每个重复样本共抽取 sum(counts) 个买家；按块依次用二项分布拆出本块的次数，再在块内按多项分布分配
+#   poisson      每个买家的次数独立服从 Poisson(1)，一组 c 个买家合计服从 Poisson(c)（样本量不固定，可并行/流式）
+def iter_weights(rng, counts, replicates=REPLICATES, method='multinomial', chunk_size=None):
+    if method not in METHODS:
+        raise ValueError(f"Unknown bootstrap method {method!r} (expected one of {', '.join(METHODS)})")
+    chunk_size = chunk_size or max(1, CHUNK_ELEMENTS // replicates)
+    remaining = np.full(replicates, counts.sum())
+    remaining_count = counts.sum()
+    for start in range(0, len(counts), chunk_size):
+        part = counts[start:start + chunk_size]
+        if method == 'poisson':
+            weights = rng.poisson(part, size=(replicates, len(part)))
+        else:
+            last = start + chunk_size >= len(counts)
+            drawn = remaining if last else rng.binomial(remaining, part.sum() / remaining_count)
+            weights = _multinomial(rng, drawn, part)
+            remaining = remaining - drawn
+            remaining_count -= part.sum()
+        yield slice(start, start + len(part)), weights
+
+
+# 每个重复样本在块内按组的大小分配 drawn 次抽取，返回 (B × 组)
+# 组都很小（多数买家各自成组）时直接抽取 drawn 个买家再计数，比逐组的二项分布快得多
+def _multinomial(rng, drawn, part):
+    size = part.sum()
+    if size > 4 * len(part):
+        return rng.multinomial(drawn, part / size)
+    replicate = np.repeat(np.arange(len(drawn)), drawn)
+    group = np.repeat(np.arange(len(part)), part)[rng.integers(0, size, size=len(replicate))]
+    return np.bincount(replicate * len(part) + group, minlength=len(drawn) * len(part)).reshape(len(drawn), -1)
+
+
+# B 个重复样本上各列的加权和，返回 (B × 列)
+def bootstrap_sums(columns, replicates=REPLICATES, seed=None, method='multinomial'):
+    with stage('bootstrap.compress', rows=len(columns)):
+        rows, counts = compress_rows(columns)
+    rng = np.random.default_rng(seed)
+    sums = np.zeros((replicates, rows.shape[1]))
+    with stage('bootstrap.resample', rows=len(rows) * replicates):
+        for part, weights in iter_weights(rng, counts, replicates, method):
+            sums += weights.astype(np.float64) @ rows[part]
+    return sums
+
+
+# 点估计和百分位置信区间；replicates 为 (B × 统计量)，某个样本中分母为 0 的统计量不计入
+def percentile_interval(estimate, replicates, confidence=CONFIDENCE):
+    tail = (1 - confidence) / 2
+    with np.errstate(all='ignore'):
+        lower, upper = np.nanquantile(replicates, [tail, 1 - tail], axis=0)
+    return np.asarray(estimate, dtype=np.float64), lower, upper
+
+
+# 买家行为分析各表格的 bootstrap 置信区间，返回 {'utilization', 'price_trend', 'summary'}
+# 重抽样单位是至少有一次购买的买家（与各表格的统计范围相同）；固定 seed 使页面重跑时区间不变
+def behavior_intervals(results, replicates=REPLICATES, confidence=CONFIDENCE, seed=0, method='multinomial'):
+    import pandas as pd
+
+    buyers = np.nonzero(results.buyer_count[:results.num_buyers + 1].sum(axis=1) > 0)[0]
+    counts, spent = results.buyer_count[buyers], results.buyer_spent[buyers]
+    type_pref = np.eye(len(results.types))[results.buyer_type[buyers].argmax(axis=1)]
+    tier_pref = np.eye(len(results.tiers))[results.buyer_tier[buyers].argmax(axis=1)]
+    num_rounds = len(results.rounds)
+    columns = np.hstack([spent, counts, counts > 0, np.ones((len(spent), 1)), type_pref, tier_pref])
+    # 第一行是原样本（每个买家权重为 1），其余为重复样本
+    sums = np.vstack([columns.sum(axis=0), bootstrap_sums(columns, replicates, seed, method)])
+
+    spent_sum, count_sum, bought_sum = (sums[:, i * num_rounds:(i + 1) * num_rounds] for i in range(3))
+    offset = 3 * num_rounds
+    buyer_sum = sums[:, offset]
+    type_sum = sums[:, offset + 1:offset + 1 + len(results.types)]
+    tier_sum = sums[:, offset + 1 + len(results.types):]
+    budgets = np.array([results.budgets[r] for r in results.rounds], dtype=np.float64)
+
+    def table(statistics, **index):
+        estimate, lower, upper = percentile_interval(statistics[0], statistics[1:], confidence)
+        return pd.DataFrame({**index, 'estimate': estimate, 'lower': lower, 'upper': upper})
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        utilization = table(spent_sum / bought_sum / budgets * 100, round=results.rounds)
+        price_trend = table(spent_sum / count_sum, round=results.rounds)
+        total_spent, total_count = spent_sum.sum(axis=1), count_sum.sum(axis=1)
+        summary = table(np.column_stack([
+            total_spent / buyer_sum,
+            total_spent / total_count,
+            total_count / buyer_sum,
+            type_sum / buyer_sum[:, None] * 100,
+            tier_sum / buyer_sum[:, None] * 100,
+        ]), statistic=['Total spent per buyer', 'Average price', 'Purchases per buyer',
+                       *(f'Prefers {label} (%)' for label in results.types),
+                       *(f'Prefers {label} tier (%)' for label in results.tiers)])
+    bought = bought_sum[0] > 0
+    return {'utilization': utilization[bought].reset_index(drop=True),
+            'price_trend': price_trend[bought].reset_index(drop=True),
+            'summary': summary}
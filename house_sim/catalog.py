@@ -0,0 +1,240 @@
+import os
+
+import numpy as np
+
+# 统一的示例房产数据（实验页、模拟页和 src/app.py 共用）
+# Location 类型的房源带有 benchmark 参考价，Property 类型没有
+HOUSES = [
+    # Value tier
+    {"id": 1, "price": 90, "tier": "Value", "type": "Location", "features": "Basic location", "benchmark": 85},
+    {"id": 2, "price": 100, "tier": "Value", "type": "Property", "features": "Standard features", "benchmark": None},
+    # Median tier
+    {"id": 3, "price": 115, "tier": "Median", "type": "Location", "features": "Commercial area", "benchmark": 110},
+    {"id": 4, "price": 115, "tier": "Median", "type": "Property", "features": "Larger space", "benchmark": None},
+    {"id": 5, "price": 125, "tier": "Median", "type": "Location", "features": "Business zone", "benchmark": 120},
+    {"id": 6, "price": 125, "tier": "Median", "type": "Property", "features": "Modern amenities", "benchmark": None},
+    # Premium tier
+    {"id": 7, "price": 140, "tier": "Premium", "type": "Location", "features": "School district", "benchmark": 135},
+    {"id": 8, "price": 140, "tier": "Premium", "type": "Property", "features": "Functional backyard", "benchmark": None},
+    {"id": 9, "price": 150, "tier": "Premium", "type": "Location", "features": "New constructions", "benchmark": 145},
+    {"id": 10, "price": 150, "tier": "Premium", "type": "Property", "features": "Luxury finishes", "benchmark": None},
+]
+
+# 实验页和模拟页默认使用前 8 个房源，src/app.py 使用全部 10 个
+DEFAULT_NUM_HOUSES = 8
+
+HOUSE_COLUMNS = ['id', 'price', 'tier', 'type', 'features', 'benchmark']
+
+
+# 创建示例房产数据
+def create_house_data(num_houses=DEFAULT_NUM_HOUSES):
+    import pandas as pd
+
+    return pd.DataFrame(HOUSES[:num_houses], columns=HOUSE_COLUMNS)
+
+
+# 按类别编码分组并在组内按价格排序，返回 (排序下标, 每组起始偏移)
+# 第 g 组的房源为 order[offsets[g]:offsets[g + 1]]，组内价格升序
+def _group_offsets(codes, prices, num_groups):
+    order = np.lexsort((prices, codes))
+    offsets = np.zeros(num_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=num_groups), out=offsets[1:])
+    return order, offsets
+
+
+# 编码存储的类别列：整数编码 + 类别标签，按下标取值时才转换为标签
+class CodedColumn:
+    def __init__(self, codes, labels):
+        self.codes = codes
+        self.labels = np.asarray(labels)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        return self.labels[self.codes[index]]
+
+
+# 变长文本列：UTF-8 字节 + 偏移表，按下标取值时才解码
+class TextColumn:
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _text(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode()
+
+    def __getitem__(self, index):
+        if np.ndim(index) == 0 and not isinstance(index, slice):
+            return self._text(int(index))
+        positions = np.arange(len(self))[index]
+        return np.array([self._text(i) for i in positions], dtype=object)
+
+
+_LAZY_COLUMNS = (np.ndarray, CodedColumn, TextColumn)
+
+
+# 类别列的 (标签, 编码)；标签按字母排序
+def _categories(values):
+    if isinstance(values, CodedColumn):
+        return values.labels, values.codes
+    return np.unique(np.asarray(values).astype(str), return_inverse=True)
+
+
+# 计算目录索引：价格排序、价格名次、类别编码、分组偏移表和 id 查找表
+def build_index(columns):
+    price = columns['price']
+    price_order = np.argsort(price, kind='stable')
+    price_rank = np.empty(len(price), dtype=np.int64)
+    price_rank[price_order] = np.arange(len(price))
+    tiers, tier_codes = _categories(columns['tier'])
+    types, type_codes = _categories(columns['type'])
+    tier_order, tier_offsets = _group_offsets(tier_codes, price, len(tiers))
+    type_order, type_offsets = _group_offsets(type_codes, price, len(types))
+    return {
+        'price_order': price_order,
+        'sorted_price': price[price_order],
+        'price_rank': price_rank,
+        'tiers': tiers,
+        'tier_codes': tier_codes,
+        'tier_order': tier_order,
+        'tier_offsets': tier_offsets,
+        'tier_sorted_price': price[tier_order],
+        'types': types,
+        'type_codes': type_codes,
+        'type_order': type_order,
+        'type_offsets': type_offsets,
+        'type_sorted_price': price[type_order],
+        'id_order': np.argsort(columns['id'], kind='stable'),
+    }
+
+
+# 带索引的房源目录
+# 预先计算价格排序、层级/类型编码和分组偏移表，
+# 可负担性和层级查询都变成二分查找或切片，不再扫描整张表
+# 从磁盘列存储打开时，列和索引都是内存映射数组（见 house_sim.store）
+class Catalog:
+    def __init__(self, columns, index=None, path=None):
+        self.columns = {name: values if isinstance(values, _LAZY_COLUMNS) else np.asarray(values)
+                        for name, values in columns.items()}
+        self.path = path
+        self.id = self.columns['id']
+        self.price = self.columns['price']
+        self.tier = self.columns['tier']
+        self.type = self.columns['type']
+        self.index = build_index(self.columns) if index is None else index
+        for name, values in self.index.items():
+            setattr(self, name, values)
+
+    # 从列存储打开的目录只按路径序列化，工作进程重新映射同一份文件，不复制数据
+    def __getstate__(self):
+        if self.path is not None:
+            return {'path': str(self.path)}
+        return self.__dict__
+
+    def __setstate__(self, state):
+        if set(state) == {'path'}:
+            from house_sim.store import open_catalog
+
+            state = open_catalog(state['path']).__dict__
+        self.__dict__.update(state)
+
+    @classmethod
+    def from_frame(cls, houses_df):
+        return cls({name: houses_df[name].to_numpy() for name in houses_df.columns})
+
+    # 接受 Catalog、DataFrame 或列数组字典
+    @classmethod
+    def from_any(cls, houses):
+        if isinstance(houses, cls):
+            return houses
+        if hasattr(houses, 'to_numpy'):
+            return cls.from_frame(houses)
+        return cls(houses)
+
+    def __len__(self):
+        return len(self.id)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    # 价格不超过预算的房源数量
+    def count_affordable(self, budget):
+        return int(np.searchsorted(self.sorted_price, budget, side='right'))
+
+    # 价格不超过预算的房源下标（按价格升序）
+    def affordable(self, budget):
+        return self.price_order[:self.count_affordable(budget)]
+
+    def _group(self, labels, order, offsets, sorted_price, label, budget):
+        code = np.searchsorted(labels, label)
+        if code >= len(labels) or labels[code] != label:
+            return order[:0]
+        start, stop = offsets[code], offsets[code + 1]
+        if budget is not None:
+            stop = start + np.searchsorted(sorted_price[start:stop], budget, side='right')
+        return order[start:stop]
+
+    # 某个层级的房源下标（按价格升序），可选只保留买得起的
+    def tier_indices(self, tier, budget=None):
+        return self._group(self.tiers, self.tier_order, self.tier_offsets,
+                           self.tier_sorted_price, tier, budget)
+
+    # 某个类型的房源下标（按价格升序），可选只保留买得起的
+    def type_indices(self, house_type, budget=None):
+        return self._group(self.types, self.type_order, self.type_offsets,
+                           self.type_sorted_price, house_type, budget)
+
+    # 属于给定层级之一的布尔掩码
+    def tier_mask(self, tiers):
+        return np.isin(self.tier_codes, np.flatnonzero(np.isin(self.tiers, list(tiers))))
+
+    # 由房源 id 查找目录下标；目录中没有的 id 得到任意一个有效下标，调用方需要时比较 id 剔除
+    def index_of(self, ids):
+        position = np.searchsorted(self.id, ids, sorter=self.id_order)
+        return self.id_order[np.minimum(position, len(self.id_order) - 1)]
+
+    # 各层级的平均价格（按层级编码排列），第一次调用时计算
+    def tier_mean_price(self):
+        if getattr(self, '_tier_mean_price', None) is None:
+            counts = np.diff(self.tier_offsets)
+            sums = np.bincount(self.tier_codes, weights=self.price.astype(np.float64), minlength=len(counts))
+            self._tier_mean_price = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        return self._tier_mean_price
+
+    # 把列和索引数组设为只读，用于在多个会话之间共享同一个目录
+    def freeze(self):
+        for values in (*self.columns.values(), *self.index.values()):
+            if isinstance(values, np.ndarray):
+                values.flags.writeable = False
+        return self
+
+    # 单个房源的字典
+    def record(self, index):
+        return {name: values[index] for name, values in self.columns.items()}
+
+    def to_frame(self, indices=None):
+        import pandas as pd
+
+        if indices is None:
+            indices = slice(None)
+        return pd.DataFrame({name: values[indices] for name, values in self.columns.items()})
+
+
+# 创建带索引的示例房源目录
+def create_catalog(num_houses=DEFAULT_NUM_HOUSES):
+    return Catalog.from_frame(create_house_data(num_houses))
+
+
+# 把 None / 文件路径 / DataFrame / 列数组字典统一转换为 Catalog
+def as_catalog(houses=None):
+    if houses is None:
+        return create_catalog()
+    if isinstance(houses, (str, os.PathLike)):
+        from house_sim.store import load_catalog
+
+        return load_catalog(houses)
+    return Catalog.from_any(houses)
@@ -0,0 +1,89 @@
+# 模拟结果图表：所有图表都由汇总器在服务端预先计算的统计量绘制
+# 发送给浏览器的数据量只取决于轮次、类别和分箱数量，与结果行数无关
+# 逐买家的图表在买家数量超过 MAX_BUYER_SERIES 时改为显示买家间的分布
+import plotly.express as px
+import plotly.graph_objects as go
+
+# 逐买家绘制的最大买家数量
+MAX_BUYER_SERIES = 50
+
+
+# 各轮次价格箱线图（四分位数和须线来自分位数草图）
+def price_box_figure(results):
+    price_stats = results.price_stats()
+    fig = go.Figure(go.Box(
+        x=price_stats['round'], q1=price_stats['q1'], median=price_stats['median'],
+        q3=price_stats['q3'], lowerfence=price_stats['lowerfence'],
+        upperfence=price_stats['upperfence'], name='price'))
+    fig.update_layout(title='Price Distribution by Round', xaxis_title='round', yaxis_title='price')
+    return fig
+
+
+# 各轮次价格直方图（服务端分箱）
+def price_histogram_figure(results):
+    histogram = results.price_histogram()
+    fig = go.Figure([go.Bar(x=part['price'], y=part['count'], width=part['width'], name=f'Round {round_num}')
+                     for round_num, part in histogram.groupby('round')])
+    fig.update_layout(title='Price Histogram by Round', xaxis_title='price', yaxis_title='count',
+                      barmode='group')
+    return fig
+
+
+def count_figure(table, title):
+    return px.bar(table, title=title, barmode='group')
+
+
+# 买家偏好：买家较少时逐买家显示百分比，否则显示百分比在买家间的分布
+def preference_figure(results, column, title):
+    if results.num_buyers <= MAX_BUYER_SERIES:
+        return px.bar(results.preference_pct(column), title=f'{title} by Buyer (%)', barmode='group')
+    fig = px.bar(results.preference_distribution(column), title=f'{title}: Share of Buyers',
+                 barmode='group')
+    fig.update_layout(xaxis_title='share of purchases', yaxis_title='buyers')
+    return fig
+
+
+# 价格趋势：买家较少时逐买家画线，否则画买家平均价格的均值和 10%-90% 分位带
+def price_trend_figure(results):
+    if results.num_buyers <= MAX_BUYER_SERIES:
+        return px.line(results.price_trend(), x='round', y='price', color='buyer',
+                       title='Average Price Paid by Buyer Over Rounds',
+                       labels={'price': 'Average Price', 'round': 'Round'})
+    bands = results.price_trend_bands()
+    fig = go.Figure([
+        go.Scatter(x=bands['round'], y=bands['p90'], mode='lines', line={'width': 0}, showlegend=False,
+                   name='90th percentile'),
+        go.Scatter(x=bands['round'], y=bands['p10'], mode='lines', line={'width': 0}, fill='tonexty',
+                   name='10th-90th percentile'),
+        go.Scatter(x=bands['round'], y=bands['p50'], mode='lines+markers', name='median'),
+        go.Scatter(x=bands['round'], y=bands['mean'], mode='lines+markers', name='mean'),
+    ])
+    fig.update_layout(title='Average Price Paid per Buyer Over Rounds', xaxis_title='Round',
+                      yaxis_title='Average Price')
+    return fig
+
+
+# 各轮次的平均预算使用率；first_purchase 见 StreamingAggregator.utilization_by_round
+def utilization_figure(results, first_purchase=False):
+    title = 'Average Budget Utilization by Round (%)'
+    if first_purchase:
+        title += ', first purchase per round'
+    return px.bar(results.utilization_by_round(first_purchase), x='round', y='utilization',
+                  hover_data=['buyers', 'avg_spent'], title=title,
+                  labels={'utilization': 'Utilization (%)', 'round': 'Round'})
+
+
+# 结果页的所有图表；behavior_analysis 为 False 时不计算按买家的图表
+def build_figures(results, behavior_analysis=True, first_purchase=False):
+    figures = {
+        'price_box': price_box_figure(results),
+        'price_histogram': price_histogram_figure(results),
+        'tier': count_figure(results.tier_counts(), 'Tier Distribution by Round'),
+        'type': count_figure(results.type_counts(), 'Property Type Distribution by Round'),
+    }
+    if behavior_analysis and results.track_buyers:
+        figures['type_pref'] = preference_figure(results, 'type', 'Property Type Selection')
+        figures['tier_pref'] = preference_figure(results, 'tier', 'Property Tier Selection')
+        figures['price_trend'] = price_trend_figure(results)
+        figures['utilization'] = utilization_figure(results, first_purchase)
+    return figures
@@ -0,0 +1,172 @@
+# 命令行入口：不加载 Streamlit/Plotly，适合批处理和定时任务
+#   python -m house_sim --buyers 1000000 --seed 42 --output results.parquet
+#   python -m house_sim --converge --tolerance-price 0.25 --seed 42
+#   python -m house_sim --buyers 100000 --policy random=0.5,anchoring=0.5
+#   python -m house_sim --buyers 100000 --stateful --max-purchases 3 --sequential
+#   python -m house_sim --buyers 100000 --compare "budgets=100/140/140" "sample_size=6" --antithetic
+import argparse
+import sys
+
+from house_sim.catalog import DEFAULT_NUM_HOUSES, HOUSES, as_catalog, create_catalog
+from house_sim.convergence import CONFIDENCE, DEFAULT_TOLERANCE, MAX_BUYERS
+from house_sim.engine import SAMPLE_SIZE
+from house_sim.policies import POLICIES, get_policy
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='house_sim', description='Run the house buying simulation headlessly.')
+    parser.add_argument('--buyers', type=int, default=5, help='number of simulated buyers')
+    parser.add_argument('--seed', type=int, default=None, help='master random seed')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes (0 = all cores)')
+    parser.add_argument('--houses', type=int, default=DEFAULT_NUM_HOUSES,
+                        choices=range(1, len(HOUSES) + 1), metavar=f'1-{len(HOUSES)}',
+                        help='number of catalog houses to use')
+    parser.add_argument('--catalog', help='CSV/Parquet listings file or catalog store directory '
+                                          '(overrides --houses)')
+    parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE, help='houses shown to each buyer')
+    parser.add_argument('--policy', type=get_policy, default='random',
+                        help=f"buyer policy ({', '.join(POLICIES)}), or a mix such as random=0.5,max_spend=0.5")
+    parser.add_argument('--output', help='write row-level results (with --converge: the precision report, '
+                                         'with --compare: the comparison report) to a .csv or .parquet file')
+    parser.add_argument('--quiet', action='store_true', help='do not print the summary tables')
+
+    converge = parser.add_argument_group('convergence mode')
+    converge.add_argument('--converge', action='store_true',
+                          help='simulate buyers in batches until every confidence interval is within tolerance')
+    converge.add_argument('--max-buyers', type=int, default=MAX_BUYERS, help='stop here even if not converged')
+    converge.add_argument('--confidence', type=float, default=CONFIDENCE, help='confidence level of the intervals')
+    converge.add_argument('--tolerance-price', type=float, default=DEFAULT_TOLERANCE['mean_price'],
+                          help='max half-width of mean price per round')
+    converge.add_argument('--tolerance-share', type=float, default=DEFAULT_TOLERANCE['tier_share'],
+                          help='max half-width of tier and type shares per round (0-1)')
+    converge.add_argument('--tolerance-utilization', type=float, default=DEFAULT_TOLERANCE['utilization'],
+                          help='max half-width of budget utilization per round (percentage points)')
+
+    stateful = parser.add_argument_group('stateful mode')
+    stateful.add_argument('--stateful', action='store_true',
+                          help='keep each buyer\'s remaining budget and owned houses across rounds')
+    stateful.add_argument('--max-purchases', type=int, default=1,
+                          help='purchases allowed per buyer per round (0 = as many as houses shown)')
+    stateful.add_argument('--no-carry-over', dest='carry_over', action='store_false',
+                          help='reset the budget every round instead of carrying unspent budget over')
+    stateful.add_argument('--sequential', action='store_true',
+                          help='view houses in presentation order; after a purchase only later houses can be bought')
+
+    compare = parser.add_argument_group('comparison mode')
+    compare.add_argument('--compare', nargs='+', metavar='VARIANT',
+                         help='compare variants against the base settings with common random numbers, e.g. '
+                              '"budgets=100/140/140;sample_size=6;policy=max_spend" (houses=N or a listings file '
+                              'also works); reports paired differences')
+    compare.add_argument('--antithetic', action='store_true',
+                         help='simulate the buyers as antithetic pairs (same number of buyers, '
+                              'half as many paired samples)')
+    return parser
+
+
+def write_table(table, output):
+    if output.endswith('.parquet'):
+        table.to_parquet(output, index=False)
+    else:
+        table.to_csv(output, index=False)
+
+
+# 收敛模式：运行到置信区间满足容差，输出达到的精度和使用的买家数
+def run_converge(args, catalog):
+    from house_sim.convergence import run_until_converged
+
+    tolerance = {'mean_price': args.tolerance_price, 'tier_share': args.tolerance_share,
+                 'type_share': args.tolerance_share, 'utilization': args.tolerance_utilization}
+    run = run_until_converged(catalog, tolerance, confidence=args.confidence, max_buyers=args.max_buyers,
+                              seed=args.seed, workers=args.workers or None, sample_size=args.sample_size,
+                              policy=args.policy)
+    if args.output:
+        write_table(run.report, args.output)
+    if not args.quiet:
+        state = 'converged' if run.converged else 'did not converge'
+        print(f"{state} after {run.buyers:,} buyers ({run.checks} checks, {run.seconds:.2f}s); "
+              f"widest interval at {run.worst_ratio:.2f}x its tolerance")
+        print(run.report.to_string(index=False))
+    return 0 if run.converged else 1
+
+
+# 有状态模式：剩余预算和已购房源在各轮之间延续，另外输出买家最终状态的汇总
+def run_stateful(args, catalog):
+    from house_sim.stateful import run_stateful_simulation
+
+    run = run_stateful_simulation(catalog, num_buyers=args.buyers, seed=args.seed,
+                                  workers=args.workers or None, sample_size=args.sample_size,
+                                  policy=args.policy, max_purchases=args.max_purchases or None,
+                                  carry_over=args.carry_over, sequential=args.sequential)
+    if not args.quiet:
+        print("\nBuyer State After the Last Round")
+        print(run.buyers.drop(columns='buyer').describe().round(2).to_string())
+    return run.results
+
+
+# 对比模式：基准配置是命令行的其他参数，每个 --compare 配置（已由 parse_variant 解析）在其上覆盖部分参数
+def run_compare(args, catalog):
+    from house_sim.compare import compare_variants
+
+    base = {'sample_size': args.sample_size, 'policy': args.policy}
+    variants = {'base': base, **{text: {**base, **params} for text, params in args.compare.items()}}
+    comparison = compare_variants(variants, catalog, num_buyers=args.buyers, seed=args.seed,
+                                  workers=args.workers or None, antithetic=args.antithetic)
+    report = comparison.report(args.confidence)
+    if args.output:
+        write_table(report, args.output)
+    if not args.quiet:
+        print(f"{comparison.buyers:,} buyers per variant ({comparison.units:,} paired samples)")
+        print(report.round(4).to_string(index=False))
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.compare:
+        from house_sim.compare import parse_variant
+
+        # 配置描述写错时给出用法错误，而不是异常堆栈
+        variants = {}
+        for text in args.compare:
+            try:
+                variants[text] = parse_variant(text)
+            except (ValueError, OSError) as exc:
+                parser.error(f"invalid --compare variant {text!r}: {exc}")
+        args.compare = variants
+
+    from house_sim import aggregate
+    from house_sim.parallel import run_simulation_parallel
+
+    catalog = as_catalog(args.catalog) if args.catalog else create_catalog(args.houses)
+    if args.converge:
+        return run_converge(args, catalog)
+    if args.compare:
+        return run_compare(args, catalog)
+    if args.stateful:
+        results = run_stateful(args, catalog)
+    else:
+        results = run_simulation_parallel(catalog, num_buyers=args.buyers,
+                                          seed=args.seed, workers=args.workers or None,
+                                          sample_size=args.sample_size, policy=args.policy)
+
+    if args.output:
+        write_table(results, args.output)
+
+    if not args.quiet:
+        print(f"{len(results)} purchases by {args.buyers} buyers")
+        print("\nTier Distribution by Round")
+        print(aggregate.tier_counts(results).to_string())
+        print("\nProperty Type Distribution by Round")
+        print(aggregate.type_counts(results).to_string())
+        print("\nAverage Price by Round")
+        print(results.groupby('round')['price'].mean().round(2).to_string())
+        if 'policy' in results:
+            print("\nAverage Price by Policy and Round")
+            print(results.pivot_table(index='round', columns='policy', values='price', aggfunc='mean',
+                                      observed=False).round(2).to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
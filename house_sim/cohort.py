@@ -0,0 +1,135 @@
+# 真实参与者的增量汇总视图，与模拟买家使用同一个 StreamingAggregator，图表可以直接对比
+# 每次刷新只读取事件日志中上次之后的新事件；参与者的购买记录在会话完成（complete 事件）时
+# 一次性并入汇总器，参与者按完成顺序编号为买家 1, 2, ...
+# 汇总状态连同已处理到的事件序号保存在事件库的 views 表中，服务重启后接着处理新事件，不需要从头回放
+# 序号之后的事件本身已经持久化在事件日志中，所以快照最多每 SNAPSHOT_INTERVAL 秒保存一次，
+# 并且在锁外序列化：发布出去的汇总器不再修改，快照直接引用它，锁内只复制未完成会话的状态
+import contextlib
+import copy
+import hashlib
+import pickle
+import threading
+import time
+
+import numpy as np
+
+from house_sim.catalog import as_catalog
+from house_sim.events import COMPLETE, PURCHASE, connect, default_path, replay
+from house_sim.profiling import stage
+from house_sim.streaming import StreamingAggregator
+
+# 超过这么久没有新事件的未完成会话视为放弃，不再保留其购买记录
+ABANDONED_AFTER = 24 * 3600
+# 两次保存汇总状态的最短间隔（秒）
+SNAPSHOT_INTERVAL = 30
+
+_VIEWS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS views (
+    name TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    catalog TEXT NOT NULL,
+    state BLOB NOT NULL
+);
+"""
+# 只保留序号最新的快照：并发的刷新先后保存时，较旧的快照不会覆盖较新的
+_UPSERT = ('INSERT INTO views (name, seq, catalog, state) VALUES (?, ?, ?, ?) '
+           'ON CONFLICT (name) DO UPDATE SET seq = excluded.seq, catalog = excluded.catalog, state = excluded.state '
+           'WHERE excluded.seq >= views.seq OR excluded.catalog != views.catalog')
+
+
+def _catalog_key(catalog):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(catalog.id))
+    digest.update(np.ascontiguousarray(catalog.price))
+    return digest.hexdigest()
+
+
+class CohortView:
+    def __init__(self, path=None, houses=None, budgets=None, name='participants'):
+        self.path = str(path or default_path())
+        self.name = name
+        self.catalog = as_catalog(houses)
+        self.budgets = budgets
+        self.seq = 0
+        self.sessions = 0
+        self.pending = {}  # 未完成的会话 -> [最后事件时间, [(轮次, 房源 id), ...]]
+        self.results = StreamingAggregator(self.catalog, budgets)
+        self._saved = 0.0
+        self._saved_seq = 0
+        self._lock = threading.Lock()
+        with contextlib.closing(connect(self.path)) as connection:
+            connection.executescript(_VIEWS_SCHEMA)
+        self._load()
+
+    # 读取新事件并更新汇总；返回本次新完成的会话数
+    # 有新会话完成时在副本上更新再替换，正在渲染旧结果的会话不受影响
+    def refresh(self):
+        snapshot = None
+        with self._lock, stage('cohort.refresh'):
+            completed = []
+            for seq, ts, session, event, round_num, house_id, _, _ in replay(self.path, after=self.seq):
+                self.seq = seq
+                if event == COMPLETE:
+                    completed.append(self.pending.pop(session, [ts, []])[1])
+                    continue
+                state = self.pending.setdefault(session, [ts, []])
+                state[0] = ts
+                if event == PURCHASE:
+                    state[1].append((round_num, house_id))
+            self._drop_abandoned()
+            if completed:
+                results = self.results.copy()
+                self._add_sessions(results, completed)
+                self.results = results
+            if self.seq > self._saved_seq and time.monotonic() - self._saved > SNAPSHOT_INTERVAL:
+                snapshot = self._snapshot()
+        if snapshot is not None:
+            with stage('cohort.snapshot'):
+                self._save(*snapshot)
+        return len(completed)
+
+    def _add_sessions(self, results, completed):
+        counts = [len(purchases) for purchases in completed]
+        buyers = np.repeat(np.arange(self.sessions + 1, self.sessions + len(completed) + 1), counts)
+        self.sessions += len(completed)
+        if not len(buyers):
+            return
+        round_num, house_id = np.array([row for purchases in completed for row in purchases],
+                                       dtype=np.int64).T
+        house_idx = self.catalog.index_of(house_id)
+        # 目录中已经不存在的房源（事件来自旧目录）不计入
+        known = (self.catalog.id[house_idx] == house_id) & np.isin(round_num, results.rounds)
+        results.update_rows(np.searchsorted(results.rounds, round_num[known]), house_idx[known], buyers[known])
+
+    def _drop_abandoned(self):
+        cutoff = time.time() - ABANDONED_AFTER
+        for session in [session for session, (ts, _) in self.pending.items() if ts < cutoff]:
+            del self.pending[session]
+
+    def _load(self):
+        with contextlib.closing(connect(self.path)) as connection:
+            row = connection.execute('SELECT seq, catalog, state FROM views WHERE name = ?',
+                                     (self.name,)).fetchone()
+        # 目录变化后旧的汇总状态无效，从头回放
+        if row is None or row[1] != _catalog_key(self.catalog):
+            return
+        state = pickle.loads(row[2])
+        state['results'].catalog = self.catalog
+        self.seq = self._saved_seq = row[0]
+        self.sessions = state['sessions']
+        self.pending = state['pending']
+        self.results = state['results']
+
+    # 在锁内取出要保存的状态：汇总器只做浅复制（去掉目录，数组与已发布的汇总器共用）
+    def _snapshot(self):
+        results = copy.copy(self.results)
+        results.catalog = None
+        pending = {session: [ts, list(purchases)] for session, (ts, purchases) in self.pending.items()}
+        self._saved = time.monotonic()
+        self._saved_seq = self.seq
+        return self.seq, {'sessions': self.sessions, 'pending': pending, 'results': results}
+
+    def _save(self, seq, state):
+        state = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        with contextlib.closing(connect(self.path)) as connection, connection:
+            connection.execute(_UPSERT, (self.name, seq, _catalog_key(self.catalog), state))
@@ -0,0 +1,181 @@
+# 配置对比模式：用公共随机数（见 engine.round_streams）运行几个配置，同一个买家在每个配置中每轮看到
+# 相同的展示抽样、得到相同的选择随机数，配置之间的差异按买家配对计算，抽样噪声大部分相互抵消
+# antithetic 为 True 时每个买家再配一个使用对偶随机数的买家，以两者的平均值作为一个样本；
+# 块大小为奇数时最后一个买家没有对偶买家，单独作为一个样本，每块模拟的买家数总是块大小
+# 每个块只返回各指标的和与平方和，内存与买家数量无关：
+#   spend         每轮的花费（没有购买为 0）
+#   purchase_rate 每轮购买的买家比例
+#   tier_rate     每轮在各层级购买的买家比例（占全部买家）
+#   total_spend   所有轮次的总花费
+# 报告中 half_width 是配对差值的置信区间半宽，independent_half_width 是用同样多买家独立运行两个配置时的半宽，
+# variance_reduction 是两者方差之比，即独立运行要达到同样精度需要的买家倍数
+from statistics import NormalDist
+
+import numpy as np
+
+from house_sim.catalog import as_catalog, create_catalog
+from house_sim.convergence import CONFIDENCE
+from house_sim.engine import BLOCK_SIZE, ROUND_BUDGETS, SAMPLE_SIZE, plan_blocks, simulate_block
+from house_sim.parallel import map_blocks
+from house_sim.policies import get_policy
+from house_sim.profiling import stage
+
+VARIANT_PARAMS = ('budgets', 'sample_size', 'policy', 'houses')
+REPORT_COLUMNS = ['variant', 'statistic', 'round', 'category', 'baseline', 'estimate', 'difference',
+                  'half_width', 'independent_half_width', 'variance_reduction']
+
+
+# 补全配置参数；houses 为 None 时使用对比时传入的目录
+def _resolve(params):
+    unknown = set(params) - set(VARIANT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown variant parameters: {sorted(unknown)}")
+    houses = params.get('houses')
+    return {
+        'budgets': ROUND_BUDGETS if params.get('budgets') is None else params['budgets'],
+        'sample_size': params.get('sample_size', SAMPLE_SIZE),
+        'policy': get_policy(params.get('policy')),
+        'houses': None if houses is None else as_catalog(houses),
+    }
+
+
+# 指标列的标签 (统计量, 轮次, 类别)，与 buyer_metrics 的列一一对应
+def metric_labels(catalog, budgets):
+    rounds = list(budgets)
+    return ([('spend', r, '') for r in rounds] + [('purchase_rate', r, '') for r in rounds]
+            + [('tier_rate', r, tier) for r in rounds for tier in catalog.tiers]
+            + [('total_spend', None, '')])
+
+
+# 由 (轮次 × 买家) 的决策矩阵计算每个买家的指标，返回 (买家 × 指标) 矩阵
+def buyer_metrics(catalog, decided):
+    bought = decided >= 0
+    index = np.where(bought, decided, 0)
+    price = np.where(bought, catalog.price[index], 0).astype(np.float64)
+    tier = np.where(bought, catalog.tier_codes[index], -1)
+    tiers = tier.T[:, :, None] == np.arange(len(catalog.tiers))
+    return np.hstack([price.T, bought.T, tiers.reshape(decided.shape[1], -1), price.sum(axis=0)[:, None]])
+
+
+# 对比一个买家块：各配置的指标和、平方和，以及与基准配置（第一个）配对差值的和、平方和
+def compare_block(catalog, size, block_seed, variants, columns, antithetic=False):
+    units = (size + 1) // 2 if antithetic else size
+    sums, sumsq, diff, diffsq = [], [], [], []
+    baseline = None
+    with stage('compare.block', rows=size * len(variants)):
+        for variant, baseline_columns in zip(variants, columns):
+            houses = catalog if variant['houses'] is None else variant['houses']
+            run = [buyer_metrics(houses, simulate_block(houses, variant['budgets'], units, block_seed,
+                                                        variant['sample_size'], variant['policy'], crn=True,
+                                                        antithetic=mirrored))
+                   for mirrored in ((False, True) if antithetic else (False,))]
+            unit = run[0]
+            if antithetic:
+                # 对偶的一半只保留 size - units 个买家，与不用对偶随机数时的买家数相同
+                run[1] = run[1][:size - units]
+                unit = run[0].copy()
+                unit[:len(run[1])] = (unit[:len(run[1])] + run[1]) / 2
+            buyers = np.vstack(run)
+            sums.append(buyers.sum(axis=0))
+            sumsq.append(np.square(buyers).sum(axis=0))
+            if baseline is None:
+                baseline = unit
+            # 基准配置没有的指标（例如多出来的轮次）没有配对差值
+            paired = np.full(unit.shape, np.nan)
+            known = baseline_columns >= 0
+            paired[:, known] = unit[:, known] - baseline[:, baseline_columns[known]]
+            diff.append(paired.sum(axis=0))
+            diffsq.append(np.square(paired).sum(axis=0))
+    return {'buyers': size, 'units': units,
+            'sums': sums, 'sumsq': sumsq, 'diff': diff, 'diffsq': diffsq}
+
+
+# 独立运行与配对的方差之比；两者都为 0（指标在两个配置中都是常数）时没有意义
+def _ratio(independent, paired):
+    if paired > 0:
+        return np.square(independent / paired)
+    return np.inf if independent > 0 else np.nan
+
+
+# 配置对比的运行结果，按块累加，report() 给出各配置相对基准配置的配对差值
+class VariantComparison:
+    def __init__(self, names, labels):
+        self.names = names
+        self.labels = labels
+        self.buyers = 0
+        self.units = 0
+        self.sums = [np.zeros(len(columns)) for columns in labels]
+        self.sumsq = [np.zeros(len(columns)) for columns in labels]
+        self.diff = [np.zeros(len(columns)) for columns in labels]
+        self.diffsq = [np.zeros(len(columns)) for columns in labels]
+
+    def update(self, block):
+        self.buyers += block['buyers']
+        self.units += block['units']
+        for name in ('sums', 'sumsq', 'diff', 'diffsq'):
+            for total, part in zip(getattr(self, name), block[name]):
+                total += part
+
+    def report(self, confidence=CONFIDENCE):
+        import pandas as pd
+
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        b, u = max(self.buyers, 1), max(self.units, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = [total / b for total in self.sums]
+            variances = [np.maximum(sq - b * mean * mean, 0) / max(b - 1, 1) for mean, sq in zip(means, self.sumsq)]
+            baseline = dict(zip(self.labels[0], zip(means[0], variances[0])))
+            rows = []
+            for i in range(1, len(self.names)):
+                difference = self.diff[i] / u
+                paired_var = np.maximum(self.diffsq[i] - u * difference * difference, 0) / max(u - 1, 1)
+                for j, (statistic, round_num, category) in enumerate(self.labels[i]):
+                    if (statistic, round_num, category) not in baseline:
+                        continue
+                    base_mean, base_var = baseline[statistic, round_num, category]
+                    half_width = z * np.sqrt(paired_var[j] / u)
+                    independent = z * np.sqrt((variances[i][j] + base_var) / b)
+                    rows.append((self.names[i], statistic, round_num, category, base_mean, means[i][j],
+                                 difference[j], half_width, independent,
+                                 _ratio(independent, half_width)))
+        return pd.DataFrame(rows, columns=REPORT_COLUMNS)
+
+
+# 用公共随机数运行 variants（{名称: 参数}，第一个为基准），返回按块累加的对比结果
+# 参数可以是 budgets、sample_size、policy 和 houses（目录，默认使用 houses_df）；
+# 各配置的目录房源数量相同时展示抽样完全对齐，数量不同时仍然有效，只是方差缩减较小
+def compare_variants(variants, houses_df=None, num_buyers=5, seed=None, workers=1, block_size=BLOCK_SIZE,
+                     antithetic=False):
+    if len(variants) < 2:
+        raise ValueError("Need a baseline and at least one variant to compare")
+    catalog = as_catalog(houses_df)
+    names = list(variants)
+    resolved = [_resolve(variants[name]) for name in names]
+    labels = [metric_labels(catalog if variant['houses'] is None else variant['houses'], variant['budgets'])
+              for variant in resolved]
+    baseline = {label: j for j, label in enumerate(labels[0])}
+    columns = [np.array([baseline.get(label, -1) for label in variant_labels]) for variant_labels in labels]
+    comparison = VariantComparison(names, labels)
+    kwargs = {'variants': resolved, 'columns': columns, 'antithetic': antithetic}
+    for _, block in map_blocks(catalog, plan_blocks(num_buyers, seed, block_size), compare_block, kwargs, workers):
+        comparison.update(block)
+    return comparison
+
+
+# 解析命令行的配置描述，例如 "budgets=100/150/150;sample_size=6;policy=max_spend"
+# budgets 按轮次用 / 分隔，houses 为房源数量或房源文件路径；空字符串表示默认配置
+def parse_variant(text):
+    params = {}
+    for item in filter(None, (part.strip() for part in text.split(';'))):
+        name, _, value = item.partition('=')
+        if name == 'budgets':
+            params[name] = {i: int(budget) if budget.isdigit() else float(budget)
+                            for i, budget in enumerate(value.split('/'), start=1)}
+        elif name == 'sample_size':
+            params[name] = int(value)
+        elif name == 'houses':
+            params[name] = create_catalog(int(value)) if value.isdigit() else as_catalog(value)
+        else:
+            params[name] = value
+    _resolve(params)
+    return params
@@ -0,0 +1,136 @@
+# 收敛模式：按块运行模拟，直到所选统计量的置信区间半宽都不超过容差，再提前停止
+# 置信区间由汇总器的运行状态直接计算（正态近似），每次检查的开销与买家数量无关：
+#   mean_price   各轮平均成交价，标准误来自价格的和与平方和
+#   tier_share   各轮各层级的成交占比，type_share 同理（Agresti-Coull 区间，占比为 0 或 1 时也有宽度）
+#   utilization  各轮平均预算使用率（%）；引擎中每个买家每轮最多购买一次，等于平均成交价 / 预算
+# 检查只在块的边界进行，块的随机流与进程数无关，所以同样的参数总在同一个块停止，结果可复现
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+from house_sim.catalog import as_catalog
+from house_sim.engine import ROUND_BUDGETS, SAMPLE_SIZE
+from house_sim.parallel import iter_blocks
+from house_sim.profiling import stage
+from house_sim.streaming import StreamingAggregator
+
+STATISTICS = ('mean_price', 'tier_share', 'type_share', 'utilization')
+# 各统计量默认的置信区间半宽上限：价格以元计，占比为 0-1，使用率以百分点计
+DEFAULT_TOLERANCE = {
+    'mean_price': 0.5,
+    'tier_share': 0.005,
+    'type_share': 0.005,
+    'utilization': 0.5,
+}
+CONFIDENCE = 0.95
+# 收敛模式的块大小（每块之后检查一次）和开始检查前至少模拟的买家数
+CHECK_BLOCK_SIZE = 4096
+MIN_BUYERS = 10_000
+MAX_BUYERS = 10_000_000
+
+REPORT_COLUMNS = ['statistic', 'round', 'category', 'estimate', 'half_width', 'tolerance', 'converged']
+
+
+def _tolerances(tolerance):
+    return {**DEFAULT_TOLERANCE, **(tolerance or {})}
+
+
+def _share_rows(rows, name, counts, labels, rounds, z, tolerance):
+    for i, round_num in enumerate(rounds):
+        n = counts[i].sum()
+        if n == 0:
+            continue
+        # Agresti-Coull：在每个类别上加 z²/2 次成功、z² 次试验后再用正态近似
+        n_adj = n + z * z
+        p_adj = (counts[i] + z * z / 2) / n_adj
+        half_widths = z * np.sqrt(p_adj * (1 - p_adj) / n_adj)
+        for label, count, half_width in zip(labels, counts[i], half_widths):
+            rows.append((name, round_num, label, count / n, half_width, tolerance))
+
+
+# 当前汇总结果上各统计量的估计值和置信区间半宽
+def precision(results, statistics=STATISTICS, confidence=CONFIDENCE, tolerance=None):
+    import pandas as pd
+
+    tolerance = _tolerances(tolerance)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    rows = []
+    n = results.tier_count.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = results.price_sum / n
+        variance = (results.price_sumsq - n * mean * mean) / (n - 1)
+        price_half = z * np.sqrt(np.maximum(variance, 0) / n)
+    budgets = np.array([results.budgets[r] for r in results.rounds], dtype=np.float64)
+    for i, round_num in enumerate(results.rounds):
+        if n[i] == 0:
+            continue
+        # 只有一笔成交时无法估计方差，视为尚未收敛
+        half_width = price_half[i] if n[i] > 1 else np.inf
+        if 'mean_price' in statistics:
+            rows.append(('mean_price', round_num, '', mean[i], half_width, tolerance['mean_price']))
+        if 'utilization' in statistics:
+            rows.append(('utilization', round_num, '', mean[i] / budgets[i] * 100,
+                         half_width / budgets[i] * 100, tolerance['utilization']))
+    if 'tier_share' in statistics:
+        _share_rows(rows, 'tier_share', results.tier_count, results.tiers, results.rounds, z,
+                    tolerance['tier_share'])
+    if 'type_share' in statistics:
+        _share_rows(rows, 'type_share', results.type_count, results.types, results.rounds, z,
+                    tolerance['type_share'])
+    report = pd.DataFrame(rows, columns=REPORT_COLUMNS[:-1])
+    report['converged'] = report['half_width'] <= report['tolerance']
+    return report
+
+
+# 所有统计量都已达到容差（没有任何成交时不算收敛）
+def is_converged(report):
+    return len(report) > 0 and bool(report['converged'].all())
+
+
+# 收敛模式的运行结果
+class ConvergenceResult:
+    def __init__(self, results, report, buyers, converged, checks, seconds):
+        self.results = results
+        self.report = report
+        self.buyers = buyers
+        self.converged = converged
+        self.checks = checks
+        self.seconds = seconds
+
+    # 最宽的置信区间相对于其容差的比例（<= 1 表示已收敛）
+    @property
+    def worst_ratio(self):
+        if self.report.empty:
+            return np.inf
+        return float((self.report['half_width'] / self.report['tolerance']).max())
+
+
+# 逐块运行模拟直到收敛或达到 max_buyers；返回汇总结果和达到的精度
+def run_until_converged(houses_df=None, tolerance=None, statistics=STATISTICS, confidence=CONFIDENCE,
+                        max_buyers=MAX_BUYERS, min_buyers=MIN_BUYERS, seed=None, workers=1,
+                        sample_size=SAMPLE_SIZE, budgets=None, block_size=CHECK_BLOCK_SIZE,
+                        track_buyers=False, policy=None):
+    start = time.perf_counter()
+    catalog = as_catalog(houses_df)
+    budgets = ROUND_BUDGETS if budgets is None else budgets
+    results = StreamingAggregator(catalog, budgets, track_buyers=track_buyers)
+    buyers, checks, report = 0, 0, None
+    blocks = iter_blocks(catalog, max_buyers, seed, workers, sample_size, budgets, block_size, policy)
+    try:
+        for block_start, decided in blocks:
+            results.update(decided, block_start)
+            buyers = block_start + decided.shape[1]
+            if buyers < min_buyers and buyers < max_buyers:
+                continue
+            with stage('convergence.check'):
+                report = precision(results, statistics, confidence, tolerance)
+            checks += 1
+            if is_converged(report):
+                break
+    finally:
+        blocks.close()
+    if report is None:
+        report = precision(results, statistics, confidence, tolerance)
+    return ConvergenceResult(results, report, buyers, is_converged(report), checks,
+                             time.perf_counter() - start)
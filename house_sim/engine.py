@@ -0,0 +1,180 @@
+import numpy as np
+
+from house_sim.catalog import as_catalog
+from house_sim.policies import PolicyMix, get_policy
+from house_sim.profiling import stage
+from house_sim.sampling import InverseTransformGenerator, sample_without_replacement
+
+# 每个买家每轮看到的房源数量
+SAMPLE_SIZE = 8
+# 每轮的预算
+ROUND_BUDGETS = {1: 100, 2: 150, 3: 150}
+# 每个买家块的大小；每块有独立的随机流，块的划分与进程数无关，
+# 因此无论用多少个进程，结果都完全一致
+BLOCK_SIZE = 65536
+
+RESULT_COLUMNS = ['round', 'house_id', 'price', 'tier', 'type', 'buyer']
+# 多个策略并排运行时结果表额外带有 policy 列
+POLICY_COLUMN = 'policy'
+
+
+# 生成每轮预算：第一轮预算有限，之后各轮预算增加
+def round_budgets(num_rounds=3, first_budget=100, later_budget=150):
+    return {round_num: first_budget if round_num == 1 else later_budget
+            for round_num in range(1, num_rounds + 1)}
+
+
+# 批量模拟买家的决策，返回所选房源在目录中的下标（买不起任何房源时为 -1）
+#   1. 每个买家随机抽取 sample_size 个不重复的房源（保留抽样顺序）
+#   2. 由 policy 的批量内核在展示的房源中做决定（见 policies 模块）
+# 默认的 RandomPolicy 与原来的 simulate_buyer 相同：随机选一个，买不起时选抽样顺序中第一个买得起的
+# state 是同一个买家块在各轮之间共享的策略状态；pick_rng 给出时策略的随机选择使用这个随机流
+def decide_buyers(catalog, budget, num_buyers, rng, sample_size=SAMPLE_SIZE, policy=None, state=None,
+                  pick_rng=None):
+    n = len(catalog)
+    k = min(sample_size, n)
+    # 用价格排序表二分查找买得起的房源数量
+    if catalog.count_affordable(budget) == 0:
+        return np.full(num_buyers, -1, dtype=np.intp)
+
+    with stage('simulate.sample', rows=num_buyers):
+        presented = sample_without_replacement(rng, n, k, num_buyers)
+    return get_policy(policy).decide(catalog, presented, budget, rng if pick_rng is None else pick_rng,
+                                     {} if state is None else state)
+
+
+# 模拟单个买家的决策（批量引擎的单买家版本），买不起时返回 None
+def simulate_buyer(houses_df, round_num, budget, rng=None, sample_size=SAMPLE_SIZE, policy=None):
+    catalog = as_catalog(houses_df)
+    rng = np.random.default_rng(rng)
+    choice = decide_buyers(catalog, budget, 1, rng, sample_size, policy)[0]
+    if choice < 0:
+        return None
+    return {
+        'round': round_num,
+        'house_id': catalog['id'][choice],
+        'price': catalog['price'][choice],
+        'tier': catalog['tier'][choice],
+        'type': catalog['type'][choice]
+    }
+
+
+# 把买家划分成固定大小的块，并从主种子为每块派生独立的随机流
+def plan_blocks(num_buyers, seed=None, block_size=BLOCK_SIZE):
+    starts = list(range(0, num_buyers, block_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    return [(start, min(block_size, num_buyers - start), block_seed)
+            for start, block_seed in zip(starts, seeds)]
+
+
+# 公共随机数：第 round_index 轮的 (展示, 选择) 两个随机流只由块种子和轮次决定，
+# 与预算、展示数量、策略以及前几轮消耗了多少随机数都无关，所以不同配置中的同一个买家每轮得到相同的随机数
+# antithetic 为 True 时返回这两个随机流的对偶版本
+def round_streams(block_seed, round_index, antithetic=False):
+    return [InverseTransformGenerator(np.random.default_rng(np.random.SeedSequence(
+        block_seed.entropy, spawn_key=(*block_seed.spawn_key, round_index, stream))), antithetic)
+        for stream in range(2)]
+
+
+# 模拟一个买家块的所有轮次，返回 (轮次 × 买家) 的决策下标矩阵
+# crn 为 True 时每轮使用 round_streams 的公共随机数（结果与默认的单一随机流不同，用于配置之间的对比）
+def simulate_block(catalog, budgets, size, block_seed, sample_size=SAMPLE_SIZE, policy=None, crn=False,
+                   antithetic=False):
+    rng = np.random.default_rng(block_seed)
+    policy = get_policy(policy)
+    state = {}
+    decided = np.empty((len(budgets), size), dtype=np.intp)
+    with stage('simulate.decide', rows=size * len(budgets)):
+        for i, budget in enumerate(budgets.values()):
+            present_rng, pick_rng = round_streams(block_seed, i, antithetic) if crn else (rng, rng)
+            decided[i] = decide_buyers(catalog, budget, size, present_rng, sample_size, policy, state, pick_rng)
+    return decided
+
+
+# 合并各块的决策矩阵，按轮次、买家的顺序构建结果表
+# 先统计购买数量再预分配输出数组，逐块填入，不拼接完整的 (轮次 × 买家) 矩阵
+# policy 为 PolicyMix 时按块内的分段记录每行买家使用的策略
+def assemble_results(catalog, budgets, blocks, policy=None):
+    rounds = np.fromiter(budgets, dtype=np.int64)
+    policy = get_policy(policy)
+    mix = policy if isinstance(policy, PolicyMix) else None
+    total = sum(int(np.count_nonzero(block >= 0)) for block in blocks)
+    choices = np.empty(total, dtype=np.intp)
+    round_col = np.empty(total, dtype=_int_dtype(rounds.min(initial=0), rounds.max(initial=0)))
+    buyer_col = np.empty(total, dtype=np.int32)
+    policy_col = None if mix is None else np.empty(total, dtype=np.int8)
+
+    with stage('results.assemble', rows=total):
+        position = 0
+        for i, round_num in enumerate(rounds):
+            start = 0
+            for block in blocks:
+                bought = np.flatnonzero(block[i] >= 0)
+                stop = position + len(bought)
+                choices[position:stop] = block[i][bought]
+                round_col[position:stop] = round_num
+                buyer_col[position:stop] = start + 1 + bought
+                if mix is not None:
+                    policy_col[position:stop] = mix.assignment(block.shape[1])[bought]
+                position = stop
+                start += block.shape[1]
+    policies = None if mix is None else (policy_col, mix.labels)
+    return build_results(catalog, choices, round_col, buyer_col, policies)
+
+
+# 运行完整模拟：所有买家 × 所有轮次，按块批量决策
+# policy 可以是策略名称、Policy 实例或 {策略: 比例}（多个策略并排运行，结果带 policy 列）
+def run_simulation(houses_df=None, num_buyers=5, seed=None, sample_size=SAMPLE_SIZE,
+                   budgets=None, block_size=BLOCK_SIZE, policy=None):
+    budgets = ROUND_BUDGETS if budgets is None else budgets
+    policy = get_policy(policy)
+    with stage('simulate.catalog'):
+        catalog = as_catalog(houses_df)
+    blocks = [simulate_block(catalog, budgets, size, block_seed, sample_size, policy)
+              for _, size, block_seed in plan_blocks(num_buyers, seed, block_size)]
+    return assemble_results(catalog, budgets, blocks, policy)
+
+
+# 能容纳 [low, high] 的最小有符号整数类型
+def _int_dtype(low, high, candidates=(np.int8, np.int16, np.int32, np.int64)):
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
+
+
+# 结果表中房源 id 和价格的紧凑类型：整数价格用 int16（放不下时用 int32），非整数价格用 float32
+def result_dtypes(catalog):
+    if len(catalog) == 0:
+        return np.int32, np.int16
+    id_low, id_high = catalog.id[catalog.id_order[0]], catalog.id[catalog.id_order[-1]]
+    id_dtype = _int_dtype(id_low, id_high, (np.int32, np.int64))
+    if np.issubdtype(catalog.price.dtype, np.integer):
+        price_dtype = _int_dtype(catalog.sorted_price[0], catalog.sorted_price[-1], (np.int16, np.int32, np.int64))
+    else:
+        price_dtype = np.float32
+    return id_dtype, price_dtype
+
+
+# 由决策下标直接构建紧凑的结果表（列与原来的逐行字典一致）
+# tier/type 为分类类型，round 为 int8，buyer/house_id 为 int32，price 为 int16 或 float32
+# policies 为 (策略编号, 策略名称) 时追加分类类型的 policy 列
+def build_results(catalog, choices, rounds, buyers, policies=None):
+    import pandas as pd
+
+    id_dtype, price_dtype = result_dtypes(catalog)
+    rounds = np.asarray(rounds)
+    with stage('results.dataframe', rows=len(choices)):
+        results = pd.DataFrame({
+            'round': rounds.astype(_int_dtype(rounds.min(initial=0), rounds.max(initial=0)), copy=False),
+            'house_id': catalog.id[choices].astype(id_dtype, copy=False),
+            'price': catalog.price[choices].astype(price_dtype, copy=False),
+            'tier': pd.Categorical.from_codes(catalog.tier_codes[choices], categories=catalog.tiers),
+            'type': pd.Categorical.from_codes(catalog.type_codes[choices], categories=catalog.types),
+            'buyer': np.asarray(buyers).astype(np.int32, copy=False),
+        }, columns=RESULT_COLUMNS)
+        if policies is not None:
+            codes, labels = policies
+            results[POLICY_COLUMN] = pd.Categorical.from_codes(codes, categories=labels)
+        return results
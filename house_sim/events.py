@@ -0,0 +1,274 @@
+# 实验会话的追加式事件日志：SQLite（WAL 模式）存储，不依赖 Streamlit
+# record() 只把事件放进内存队列，由后台线程按批写入，记录事件不会增加点击的延迟；
+# WAL 模式下多个服务进程可以同时追加，读取（回放、导出）不会阻塞写入
+# 写入失败（数据库被锁、磁盘已满等）的批次保留在内存中，每隔 RETRY_INTERVAL 秒连同新事件一起重试，
+# 事件不会丢失；flush() 在仍有未写入的事件或写线程已经停止时抛出 EventLogError
+#   python -m house_sim.events export events.parquet
+import argparse
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+# 设置后使用这个文件作为事件库，否则使用当前目录下的 DEFAULT_PATH
+EVENTS_ENV = 'HOUSE_SIM_EVENTS'
+DEFAULT_PATH = 'experiment_events.sqlite'
+
+# 每批最多写入的事件数；队列空闲时最多等待 FLUSH_INTERVAL 秒再写入已积攒的事件
+BATCH_SIZE = 1000
+FLUSH_INTERVAL = 0.25
+# 写入失败后重试的间隔（秒）；关闭日志时最多再重试 CLOSE_RETRIES 次
+RETRY_INTERVAL = 1.0
+CLOSE_RETRIES = 3
+# flush() 默认最多等待的秒数
+FLUSH_TIMEOUT = 30
+
+# 实验页记录的事件类型
+SESSION_START = 'session_start'
+VIEW = 'view'
+BENCHMARK = 'benchmark'
+SKIP = 'skip'
+PURCHASE = 'purchase'
+PURCHASE_FAILED = 'purchase_failed'
+ROUND = 'round'
+COMPLETE = 'complete'
+
+COLUMNS = ['seq', 'ts', 'session', 'event', 'round', 'house_id', 'price', 'data']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    session TEXT NOT NULL,
+    event TEXT NOT NULL,
+    round INTEGER,
+    house_id INTEGER,
+    price REAL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS events_session ON events (session, seq);
+"""
+_INSERT = ('INSERT INTO events (ts, session, event, round, house_id, price, data) '
+           'VALUES (?, ?, ?, ?, ?, ?, ?)')
+
+_STOP = object()
+
+
+def default_path():
+    return os.environ.get(EVENTS_ENV, DEFAULT_PATH)
+
+
+def connect(path, readonly=False):
+    if readonly:
+        connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True, timeout=30)
+    else:
+        connection = sqlite3.connect(path, timeout=30)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(_SCHEMA)
+    return connection
+
+
+def _optional(value, cast):
+    return None if value is None else cast(value)
+
+
+class EventLogError(RuntimeError):
+    pass
+
+
+# 进程内的事件日志：一个后台写线程、一个连接，所有会话共用
+#   written     已写入的事件数
+#   unwritten   写入失败、等待重试的事件数
+#   error       最近一次写入失败的异常（之后写入成功时清空），failures 为累计失败次数
+class EventLog:
+    def __init__(self, path=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 retry_interval=RETRY_INTERVAL):
+        self.path = str(path or default_path())
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.written = 0
+        self.unwritten = 0
+        self.error = None
+        self.failures = 0
+        self._queue = queue.SimpleQueue()
+        # 先在调用线程上建表，路径不可写时立即报错
+        connect(self.path).close()
+        self._thread = threading.Thread(target=self._write_loop, name='house-sim-events', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # 追加一个事件（只入队，不等待写入）；data 中的其他字段以 JSON 保存
+    def record(self, session, event, round=None, house_id=None, price=None, **data):
+        self._queue.put((time.time(), str(session), event, _optional(round, int),
+                         _optional(house_id, int), _optional(price, float),
+                         json.dumps(data, default=str) if data else None))
+
+    # 等待此前入队的事件全部写入；超时返回 False，有事件写入失败或写线程已经停止时抛出 EventLogError
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        done = threading.Event()
+        self._queue.put(done)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not done.wait(self.flush_interval):
+            if not self._thread.is_alive():
+                raise EventLogError(f"Event log writer for {self.path} has stopped") from self.error
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        if self.unwritten:
+            raise EventLogError(f"{self.unwritten} events could not be written to {self.path}: "
+                                f"{self.error}") from self.error
+        return True
+
+    def close(self, timeout=None):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    # 取出下一批事件；有待重试的批次时最多等待 retry_interval 秒，到时即使没有新事件也返回
+    def _next_batch(self, retrying):
+        batch, waiters, stop = [], [], False
+        try:
+            item = self._queue.get(timeout=self.retry_interval) if retrying else self._queue.get()
+        except queue.Empty:
+            return batch, waiters, stop
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            else:
+                batch.append(item)
+            if stop or waiters or len(batch) >= self.batch_size:
+                break
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+        return batch, waiters, stop
+
+    def _write_loop(self):
+        connection, failed = None, []
+        try:
+            while True:
+                batch, waiters, stop = self._next_batch(retrying=bool(failed))
+                # 失败的事件排在新事件之前，保持写入顺序
+                connection, failed = self._write(connection, failed + batch)
+                for _ in range(CLOSE_RETRIES if stop else 0):
+                    if not failed:
+                        break
+                    time.sleep(self.retry_interval)
+                    connection, failed = self._write(connection, failed)
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    break
+        except Exception as exc:
+            # 写线程意外退出：保留原因，flush() 据此报错
+            self.error = exc
+            raise
+        finally:
+            if connection is not None:
+                connection.close()
+
+    # 写入一批事件，返回 (连接, 未写入的事件)；失败时关闭连接，下次重试时重新连接
+    def _write(self, connection, batch):
+        if not batch:
+            return connection, batch
+        try:
+            if connection is None:
+                connection = connect(self.path)
+            with connection:
+                connection.executemany(_INSERT, batch)
+        except sqlite3.Error as exc:
+            self.error = exc
+            self.failures += 1
+            self.unwritten = len(batch)
+            if connection is not None:
+                connection.close()
+            return None, batch
+        self.written += len(batch)
+        self.unwritten = 0
+        self.error = None
+        return connection, []
+
+    # 按写入顺序回放事件（可只回放某个会话，或只读 seq 大于 after 的新事件）
+    def replay(self, session=None, after=0, batch_size=BATCH_SIZE):
+        return replay(self.path, session, after, batch_size)
+
+    def to_frame(self, session=None, after=0):
+        return to_frame(self.path, session, after)
+
+    # 某个会话第一个事件的时间戳，会话不存在时为 None
+    def session_started(self, session):
+        connection = connect(self.path, readonly=True)
+        try:
+            return connection.execute('SELECT MIN(ts) FROM events WHERE session = ?', (str(session),)).fetchone()[0]
+        finally:
+            connection.close()
+
+
+def _select(session, after):
+    if session is None:
+        return 'SELECT * FROM events WHERE seq > ? ORDER BY seq', (after,)
+    return 'SELECT * FROM events WHERE session = ? AND seq > ? ORDER BY seq', (str(session), after)
+
+
+# 逐批读取事件行 (seq, ts, session, event, round, house_id, price, data)
+def replay(path=None, session=None, after=0, batch_size=BATCH_SIZE):
+    connection = connect(path or default_path(), readonly=True)
+    try:
+        cursor = connection.execute(*_select(session, after))
+        while rows := cursor.fetchmany(batch_size):
+            yield from rows
+    finally:
+        connection.close()
+
+
+def to_frame(path=None, session=None, after=0):
+    import pandas as pd
+
+    connection = connect(path or default_path(), readonly=True)
+    try:
+        sql, params = _select(session, after)
+        events = pd.read_sql_query(sql, connection, params=params)
+    finally:
+        connection.close()
+    events['ts'] = pd.to_datetime(events['ts'], unit='s')
+    events['event'] = events['event'].astype('category')
+    return events
+
+
+# 导出为 .parquet 或 .csv，返回导出的事件数
+def export(output, path=None, session=None, after=0):
+    events = to_frame(path, session, after)
+    if str(output).endswith('.parquet'):
+        events.to_parquet(output, index=False)
+    else:
+        events.to_csv(output, index=False)
+    return len(events)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='house_sim.events', description='Export recorded experiment events.')
+    parser.add_argument('command', choices=['export'])
+    parser.add_argument('output', help='.parquet or .csv file to write')
+    parser.add_argument('--events', default=None, help=f'event database (default: ${EVENTS_ENV} or {DEFAULT_PATH})')
+    parser.add_argument('--session', default=None, help='only export this session')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    count = export(args.output, args.events, args.session)
+    print(f"{count} events written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# 后台模拟任务：在线程中逐块运行模拟（可再用进程池并行），
+# 支持进度查询、取消和读取部分汇总结果；任务管理器在 Streamlit 的多次重跑之间共享
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from house_sim.catalog import as_catalog
+from house_sim.convergence import CONFIDENCE, MIN_BUYERS, STATISTICS, is_converged, precision
+from house_sim.engine import BLOCK_SIZE, ROUND_BUDGETS, SAMPLE_SIZE
+from house_sim.parallel import iter_blocks
+from house_sim.policies import get_policy
+from house_sim.profiling import activate
+from house_sim.streaming import StreamingAggregator
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+FINISHED_STATES = (DONE, CANCELLED, FAILED)
+
+
+# 单个后台模拟任务；给出 profiler 时在任务线程上记录各阶段耗时
+# 给出 tolerance（各统计量的置信区间半宽上限）时为收敛模式：num_buyers 是上限，
+# 每块之后检查一次精度，全部满足容差就提前结束（见 convergence 模块）
+class SimulationJob:
+    def __init__(self, job_id, houses=None, num_buyers=5, seed=None, workers=1,
+                 sample_size=SAMPLE_SIZE, budgets=None, block_size=BLOCK_SIZE, track_buyers=True,
+                 profiler=None, tolerance=None, confidence=CONFIDENCE, statistics=STATISTICS,
+                 policy=None):
+        self.id = job_id
+        self.catalog = as_catalog(houses)
+        self.budgets = ROUND_BUDGETS if budgets is None else budgets
+        self.num_buyers = num_buyers
+        self.seed = seed
+        self.workers = workers
+        self.sample_size = sample_size
+        self.policy = get_policy(policy)
+        self.block_size = block_size
+        self.track_buyers = track_buyers
+        self.profiler = profiler
+        self.tolerance = tolerance
+        self.confidence = confidence
+        self.statistics = statistics
+        self.report = None
+        self.converged = False
+
+        self.status = PENDING
+        self.completed = 0
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._aggregator = StreamingAggregator(self.catalog, self.budgets, track_buyers=track_buyers)
+
+    @property
+    def total(self):
+        return self.num_buyers
+
+    # 已完成的买家比例
+    @property
+    def progress(self):
+        return 1.0 if self.num_buyers == 0 else self.completed / self.num_buyers
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATES
+
+    def cancel(self):
+        self._cancel.set()
+
+    # 当前（可能是部分的）汇总结果的副本
+    def snapshot(self):
+        with self._lock:
+            return self._aggregator.copy()
+
+    # 任务结束后的汇总结果（取消时为已完成部分的结果）
+    def result(self):
+        return self._aggregator if self.done else None
+
+    def run(self):
+        with activate(self.profiler):
+            self._run()
+
+    def _run(self):
+        self.status = RUNNING
+        self.started = time.time()
+        blocks = iter_blocks(self.catalog, self.num_buyers, self.seed, self.workers,
+                             self.sample_size, self.budgets, self.block_size, self.policy)
+        try:
+            for start, decided in blocks:
+                if self._cancel.is_set():
+                    break
+                with self._lock:
+                    self._aggregator.update(decided, start)
+                    self.completed += decided.shape[1]
+                if self.tolerance is not None and self._check_convergence():
+                    break
+            self.status = CANCELLED if self._cancel.is_set() else DONE
+        except Exception as exc:
+            self.error = exc
+            self.status = FAILED
+        finally:
+            blocks.close()
+            self.finished = time.time()
+
+    def _check_convergence(self):
+        if self.completed < min(MIN_BUYERS, self.num_buyers):
+            return False
+        self.report = precision(self._aggregator, self.statistics, self.confidence, self.tolerance)
+        self.converged = is_converged(self.report)
+        return self.converged
+
+
+# 后台任务管理器（线程池），只保留最近 keep_finished 个已结束的任务
+class JobManager:
+    def __init__(self, max_workers=2, keep_finished=32):
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='house-sim-job')
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, houses=None, **params):
+        with self._lock:
+            job = SimulationJob(f'job-{next(self._ids)}', houses, **params)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(job.run)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def jobs(self):
+        return list(self._jobs.values())
+
+    def shutdown(self, cancel=True):
+        if cancel:
+            for job in self.jobs():
+                job.cancel()
+        self._executor.shutdown(wait=True)
+
+    def _prune(self):
+        finished = sorted((job for job in self._jobs.values() if job.done), key=lambda job: job.finished)
+        for job in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job.id]
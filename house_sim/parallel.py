@@ -0,0 +1,70 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from house_sim.catalog import as_catalog
+from house_sim.engine import (
+    BLOCK_SIZE,
+    ROUND_BUDGETS,
+    SAMPLE_SIZE,
+    assemble_results,
+    plan_blocks,
+    simulate_block,
+)
+from house_sim.policies import get_policy
+
+# 工作进程中共享的房源目录，由进程池初始化函数设置，避免每个任务重复传输
+_worker_catalog = None
+
+
+def _init_worker(catalog):
+    global _worker_catalog
+    _worker_catalog = catalog
+
+
+def _run_block(func, size, block_seed, kwargs):
+    return func(_worker_catalog, size=size, block_seed=block_seed, **kwargs)
+
+
+# 按块的顺序逐个产出 (起始买家下标, func(catalog, size=..., block_seed=..., **kwargs))
+# workers > 1 时用进程池并行计算，但产出顺序始终与块的顺序一致
+def map_blocks(catalog, plan, func, kwargs, workers=None):
+    workers = min(workers or os.cpu_count() or 1, max(len(plan), 1))
+
+    if workers == 1:
+        for start, size, block_seed in plan:
+            yield start, func(catalog, size=size, block_seed=block_seed, **kwargs)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(catalog,)) as pool:
+        futures = [pool.submit(_run_block, func, size, block_seed, kwargs)
+                   for _, size, block_seed in plan]
+        try:
+            for (start, _, _), future in zip(plan, futures):
+                yield start, future.result()
+        finally:
+            # 提前停止（例如取消后台任务）时，不再等待尚未开始的块
+            for future in futures:
+                future.cancel()
+
+
+# 按块的顺序逐个产出 (起始买家下标, 决策矩阵)
+def iter_blocks(houses_df=None, num_buyers=5, seed=None, workers=None, sample_size=SAMPLE_SIZE,
+                budgets=None, block_size=BLOCK_SIZE, policy=None):
+    budgets = ROUND_BUDGETS if budgets is None else budgets
+    catalog = as_catalog(houses_df)
+    kwargs = {'budgets': budgets, 'sample_size': sample_size, 'policy': get_policy(policy)}
+    yield from map_blocks(catalog, plan_blocks(num_buyers, seed, block_size), simulate_block, kwargs, workers)
+
+
+# 用进程池并行运行模拟
+# 买家按固定大小分块，每块的随机流都由同一个主种子派生，
+# 所以合并后的结果与 run_simulation 以及任意进程数的运行结果逐位相同
+def run_simulation_parallel(houses_df=None, num_buyers=5, seed=None, workers=None,
+                            sample_size=SAMPLE_SIZE, budgets=None, block_size=BLOCK_SIZE, policy=None):
+    catalog = as_catalog(houses_df)
+    budgets = ROUND_BUDGETS if budgets is None else budgets
+    policy = get_policy(policy)
+    blocks = [decided for _, decided in iter_blocks(catalog, num_buyers, seed, workers,
+                                                    sample_size, budgets, block_size, policy)]
+    return assemble_results(catalog, budgets, blocks, policy)
@@ -0,0 +1,200 @@
+# 买家决策策略：每个策略是作用于 (买家 × 展示房源) 矩阵的批量内核，而不是逐买家的 Python 函数
+# choose(catalog, presented, available, rng, state) 返回每个买家选中的目录下标（不购买为 -1）：
+#   presented  每个买家本轮看到的房源下标，按展示顺序排列
+#   available  与 presented 同形状的布尔矩阵，表示每个展示房源能否购买（买得起，有状态模拟中还要求未拥有等）
+#   state      同一个买家块在各轮之间共享的字典，有状态的策略（如层级忠诚）在这里保存上一轮的信息
+# decide(catalog, presented, budget, rng, state) 是所有买家预算相同时的入口，可购买即买得起
+# 多个策略可以通过 PolicyMix 在同一次模拟中并排运行，每个块内的买家按比例分给各个策略
+import numpy as np
+
+NO_PURCHASE = -1
+
+
+# 每个展示房源是否买得起（价格名次小于可负担数量即买得起）
+def affordable_mask(catalog, presented, budget):
+    return catalog.price_rank[presented] < catalog.count_affordable(budget)
+
+
+# 每行第一个满足条件的位置对应的房源，没有满足条件的位置时为 -1
+def first_where(presented, mask):
+    rows = np.arange(len(presented))
+    return np.where(mask.any(axis=1), presented[rows, mask.argmax(axis=1)], NO_PURCHASE)
+
+
+# 每行在满足条件的位置中得分最高的房源（得分相同取展示顺序靠前的），没有满足条件的位置时为 -1
+def best_where(presented, mask, score):
+    rows = np.arange(len(presented))
+    score = np.where(mask, score, -np.inf)
+    return np.where(mask.any(axis=1), presented[rows, score.argmax(axis=1)], NO_PURCHASE)
+
+
+class Policy:
+    name = None
+
+    def decide(self, catalog, presented, budget, rng, state):
+        return self.choose(catalog, presented, affordable_mask(catalog, presented, budget), rng, state)
+
+    def choose(self, catalog, presented, available, rng, state):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f'{type(self).__name__}()'
+
+
+# 原来的 simulate_buyer 规则：随机选一个，买不起时回退到展示顺序中第一个买得起的
+class RandomPolicy(Policy):
+    name = 'random'
+
+    def decide(self, catalog, presented, budget, rng, state):
+        if catalog.count_affordable(budget) < len(catalog):
+            return super().decide(catalog, presented, budget, rng, state)
+        # 所有房源都买得起，不需要回退
+        num_buyers, k = presented.shape
+        return presented[np.arange(num_buyers), rng.integers(0, k, size=num_buyers)]
+
+    def choose(self, catalog, presented, available, rng, state):
+        num_buyers, k = presented.shape
+        rows = np.arange(num_buyers)
+        position = rng.integers(0, k, size=num_buyers)
+        return np.where(available[rows, position], presented[rows, position], first_where(presented, available))
+
+
+# 基准锚定：以参考价衡量每个房源的溢价，买溢价最低（最划算）的买得起的房源
+# Location 房源的参考价是 benchmark，没有 benchmark 的房源以同层级的平均价格为参考
+class AnchoringPolicy(Policy):
+    name = 'anchoring'
+
+    def choose(self, catalog, presented, available, rng, state):
+        price = catalog.price[presented].astype(np.float64)
+        reference = catalog.tier_mean_price()[catalog.tier_codes[presented]]
+        if 'benchmark' in catalog.columns:
+            benchmark = np.asarray(catalog['benchmark'][presented], dtype=np.float64)
+            reference = np.where(np.isfinite(benchmark) & (benchmark > 0), benchmark, reference)
+        return best_where(presented, available, reference / price)
+
+
+# 预算最大化：买预算内最贵的房源
+class MaxSpendPolicy(Policy):
+    name = 'max_spend'
+
+    def choose(self, catalog, presented, available, rng, state):
+        return best_where(presented, available, catalog.price_rank[presented])
+
+
+# 层级忠诚：第一次购买按 base 策略决定，之后只买同一层级中展示顺序第一个买得起的房源；
+# 本轮没有同层级的房源可买时，strict 为 True 则不购买，否则按 base 策略购买（层级不变）
+class TierLoyaltyPolicy(Policy):
+    name = 'tier_loyal'
+
+    def __init__(self, base=None, strict=False):
+        self.base = RandomPolicy() if base is None else base
+        self.strict = strict
+
+    def choose(self, catalog, presented, available, rng, state):
+        loyal = state.get('tier')
+        if loyal is None:
+            loyal = state['tier'] = np.full(len(presented), NO_PURCHASE, dtype=np.int64)
+        same_tier = available & (catalog.tier_codes[presented] == loyal[:, None])
+        chosen = first_where(presented, same_tier)
+        fallback = (loyal < 0) if self.strict else (chosen < 0)
+        if fallback.any():
+            chosen[fallback] = self.base.choose(catalog, presented[fallback], available[fallback], rng,
+                                                state.setdefault('base', {}))
+        newly = (loyal < 0) & (chosen >= 0)
+        loyal[newly] = catalog.tier_codes[chosen[newly]]
+        return chosen
+
+    def __repr__(self):
+        return f'TierLoyaltyPolicy(base={self.base!r}, strict={self.strict})'
+
+
+# 逐个查看、当场决定买或跳过（与实验页相同）：先只看不买前 explore 个房源，
+# 之后买第一个买得起且价格不高于观察期内最低价的房源；都不满足时买最后一个买得起的房源
+class SequentialPolicy(Policy):
+    name = 'sequential'
+
+    def __init__(self, explore=3):
+        self.explore = explore
+
+    def choose(self, catalog, presented, available, rng, state):
+        k = presented.shape[1]
+        explore = min(self.explore, k - 1)
+        price = catalog.price[presented]
+        position = np.arange(k)
+        accept = available & (position >= explore)
+        if explore > 0:
+            accept &= price <= price[:, :explore].min(axis=1)[:, None]
+        chosen = first_where(presented, accept)
+        last = first_where(presented[:, ::-1], available[:, ::-1])
+        return np.where(chosen >= 0, chosen, last)
+
+    def __repr__(self):
+        return f'SequentialPolicy(explore={self.explore})'
+
+
+POLICIES = {policy.name: policy for policy in
+            (RandomPolicy, AnchoringPolicy, MaxSpendPolicy, TierLoyaltyPolicy, SequentialPolicy)}
+
+
+# 多个策略并排运行：每个块内的买家按 shares 的比例分成连续的几段，每段使用一个策略
+# 分段只取决于块的大小，与进程数无关；每个策略在各自的 state 中保存自己的跨轮信息
+class PolicyMix(Policy):
+    name = 'mix'
+
+    def __init__(self, policies):
+        items = list(policies.items()) if isinstance(policies, dict) else [(policy, 1) for policy in policies]
+        self.policies = [get_policy(policy) for policy, _ in items]
+        shares = np.array([share for _, share in items], dtype=np.float64)
+        if len(shares) == 0 or (shares < 0).any() or shares.sum() <= 0:
+            raise ValueError(f"Invalid policy shares: {shares.tolist()}")
+        self.shares = shares / shares.sum()
+        # 结果表 policy 列的类别；同一个策略出现多次时加上序号区分
+        names = [policy.name for policy in self.policies]
+        self.labels = [name if names.count(name) == 1 else f'{name}_{i + 1}' for i, name in enumerate(names)]
+
+    # 各策略在一个大小为 size 的块中负责的买家区间边界
+    def bounds(self, size):
+        return np.concatenate([[0], np.round(np.cumsum(self.shares) * size).astype(np.int64)])
+
+    # 块内每个买家使用的策略编号
+    def assignment(self, size):
+        return np.repeat(np.arange(len(self.policies)), np.diff(self.bounds(size)))
+
+    def decide(self, catalog, presented, budget, rng, state):
+        return self._segments(presented, lambda policy, rows, policy_state: policy.decide(
+            catalog, presented[rows], budget, rng, policy_state), state)
+
+    def choose(self, catalog, presented, available, rng, state):
+        return self._segments(presented, lambda policy, rows, policy_state: policy.choose(
+            catalog, presented[rows], available[rows], rng, policy_state), state)
+
+    def _segments(self, presented, run, state):
+        bounds = self.bounds(len(presented))
+        chosen = np.empty(len(presented), dtype=np.intp)
+        for i, policy in enumerate(self.policies):
+            rows = slice(bounds[i], bounds[i + 1])
+            if bounds[i + 1] > bounds[i]:
+                chosen[rows] = run(policy, rows, state.setdefault(i, {}))
+        return chosen
+
+    def __repr__(self):
+        return f'PolicyMix({dict(zip(map(repr, self.policies), self.shares.round(4).tolist()))})'
+
+
+# 策略名称、Policy 实例或 {策略: 比例} 字典（多个策略并排运行）统一转换为 Policy
+# 字符串也可以写成 "random=0.5,max_spend=0.5" 的形式（命令行和参数扫描使用）
+def get_policy(policy=None):
+    if policy is None:
+        return RandomPolicy()
+    if isinstance(policy, Policy):
+        return policy
+    if isinstance(policy, str) and ('=' in policy or ',' in policy):
+        policy = {name.strip(): float(share) if share else 1.0
+                  for name, _, share in (part.partition('=') for part in policy.split(','))}
+    if isinstance(policy, (dict, list, tuple)):
+        mix = PolicyMix(policy)
+        return mix.policies[0] if len(mix.policies) == 1 else mix
+    try:
+        return POLICIES[policy]()
+    except KeyError:
+        raise ValueError(f"Unknown policy {policy!r} (expected one of {', '.join(POLICIES)})") from None
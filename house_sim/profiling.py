@@ -0,0 +1,159 @@
+# 轻量的阶段耗时和计数埋点
+# 只有在当前线程上激活了 Profiler 时才记录；未激活时 stage() 返回共享的空上下文，
+# 开销只是一次线程局部变量查找，埋点只放在按块/按轮次的位置，不放在逐行循环里
+# 进程池工作进程中的阶段不会被记录（只记录调用线程上的耗时）
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# 每个 Profiler 最多保留的事件数，超出后只累计统计，不再记录单个事件
+MAX_EVENTS = 20000
+
+_local = threading.local()
+_NULL = contextlib.nullcontext()
+
+
+# 记录各阶段的调用次数、累计耗时和处理行数，以及可导出的事件轨迹
+class Profiler:
+    def __init__(self, max_events=MAX_EVENTS):
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.origin = time.perf_counter()
+            self.started = time.time()
+            self.stages = {}
+            self.counters = {}
+            self.events = []
+            self.dropped = 0
+
+    def record(self, name, start, seconds, rows=None):
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = {'calls': 0, 'seconds': 0.0, 'rows': 0, 'last': 0.0}
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['rows'] += rows or 0
+            stats['last'] = seconds
+            if len(self.events) < self.max_events:
+                self.events.append((name, start - self.origin, seconds, rows, threading.get_ident()))
+            else:
+                self.dropped += 1
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    # 在当前线程上激活（可嵌套，退出时恢复之前的 Profiler）
+    @contextlib.contextmanager
+    def activate(self):
+        previous = getattr(_local, 'profiler', None)
+        _local.profiler = self
+        try:
+            yield self
+        finally:
+            _local.profiler = previous
+
+    # 各阶段统计，按累计耗时从高到低排列
+    def summary(self):
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1]['seconds'], reverse=True)
+            return [{
+                'stage': name,
+                'calls': stats['calls'],
+                'total_ms': stats['seconds'] * 1000,
+                'mean_ms': stats['seconds'] * 1000 / stats['calls'],
+                'last_ms': stats['last'] * 1000,
+                'rows': stats['rows'],
+            } for name, stats in stages]
+
+    # Chrome 轨迹格式（chrome://tracing、Perfetto 可以直接打开），附带阶段统计和计数
+    def to_trace(self):
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+            dropped = self.dropped
+        return {
+            'traceEvents': [{
+                'name': name,
+                'cat': name.split('.')[0],
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': seconds * 1e6,
+                'pid': pid,
+                'tid': thread,
+                'args': {} if rows is None else {'rows': rows},
+            } for name, start, seconds, rows, thread in events],
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'started': self.started,
+                'stages': self.summary(),
+                'counters': counters,
+                'dropped_events': dropped,
+            },
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_trace())
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'rows', 'start')
+
+    def __init__(self, profiler, name, rows):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start, self.rows)
+        return False
+
+
+# 当前线程上激活的 Profiler（没有时为 None）
+def active():
+    return getattr(_local, 'profiler', None)
+
+
+# 在当前线程上激活 profiler；profiler 为 None 时什么都不做
+def activate(profiler):
+    return _NULL if profiler is None else profiler.activate()
+
+
+# 计时一个阶段：with stage('simulate.block', rows=n): ...
+def stage(name, rows=None):
+    profiler = getattr(_local, 'profiler', None)
+    if profiler is None:
+        return _NULL
+    return _Stage(profiler, name, rows)
+
+
+def count(name, value=1):
+    profiler = getattr(_local, 'profiler', None)
+    if profiler is not None:
+        profiler.count(name, value)
+
+
+# 把整个函数作为一个阶段计时
+def timed(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = getattr(_local, 'profiler', None)
+            if profiler is None:
+                return func(*args, **kwargs)
+            with _Stage(profiler, name, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
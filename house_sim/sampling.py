@@ -0,0 +1,75 @@
+# 批量无放回抽样：一次为一批买家各抽取 k 个不重复的房源，返回 (买家 × k) 的下标矩阵
+# 每一行都是 0..n-1 中均匀随机的有序 k 元子集（与 DataFrame.sample(n=k) 的分布相同）
+import numpy as np
+
+# n 不超过 k * k（或 16）时用随机键排序（每个买家分配 n 个随机数）；
+# 更大的目录用稀疏的部分 Fisher-Yates 洗牌，每个买家只占用 O(k) 的内存
+def _use_dense(n, k):
+    return n <= max(k * k, 16)
+
+
+# 随机键排序：每行取 n 个随机键排序后的前 k 个
+def _dense_sample(rng, n, k, size):
+    return np.argsort(rng.random((size, n)), axis=1)[:, :k]
+
+
+# 部分 Fisher-Yates 洗牌：虚拟数组 arr = 0..n-1，第 j 步把 arr[j] 与 arr[r] (r >= j) 交换并输出 arr[r]
+# 只记录被交换过的位置（每行最多 k 个），所以不需要为每个买家分配长度为 n 的数组
+def _sparse_sample(rng, n, k, size):
+    rows = np.arange(size)
+    keys = np.full((size, k), -1, dtype=np.int64)
+    values = np.empty((size, k), dtype=np.int64)
+    out = np.empty((size, k), dtype=np.int64)
+
+    def lookup(positions, used):
+        match = keys[:, :used] == positions[:, None]
+        found = match.any(axis=1)
+        slot = match.argmax(axis=1) if used else np.zeros(size, dtype=np.intp)
+        current = np.where(found, values[rows, slot] if used else positions, positions)
+        return current, found, slot
+
+    for j in range(k):
+        r = j + rng.integers(0, n - j, size=size)
+        value_r, found_r, slot_r = lookup(r, j)
+        value_j, _, _ = lookup(np.full(size, j), j)
+        out[:, j] = value_r
+        # arr[r] = arr[j]：已记录的位置原地更新，否则占用第 j 个槽位
+        slot = np.where(found_r, slot_r, j)
+        keys[rows, slot] = r
+        values[rows, slot] = value_j
+    return out
+
+
+# 为 size 个买家各抽取 k 个不重复的下标（0..n-1）
+def sample_without_replacement(rng, n, k, size):
+    if not 0 <= k <= n:
+        raise ValueError(f"Cannot draw {k} distinct items from {n}")
+    if size == 0 or k == 0:
+        return np.empty((size, k), dtype=np.intp)
+    if _use_dense(n, k):
+        return _dense_sample(rng, n, k, size)
+    return _sparse_sample(rng, n, k, size).astype(np.intp)
+
+
+# 公共随机数使用的随机流：整数按逆变换 low + floor(u * (high - low)) 由均匀随机数得到，
+# 取值范围不同的两次抽样（例如展示 6 个和 8 个房源时选中的位置）由同一个 u 单调对应
+# antithetic 为 True 时每个 u 换成 1 - u（对偶随机数），与原随机流逐个配对、分布相同
+class InverseTransformGenerator:
+    def __init__(self, rng, antithetic=False):
+        self.rng = rng
+        self.antithetic = antithetic
+
+    def random(self, size=None):
+        u = self.rng.random(size)
+        return 1.0 - u if self.antithetic else u
+
+    def integers(self, low, high=None, size=None):
+        if high is None:
+            low, high = 0, low
+        span = np.asarray(high) - low
+        return low + np.minimum((self.random(size) * span).astype(np.int64), span - 1)
+
+
+# 一个随机排列（实验页每轮的房源顺序）
+def shuffled_order(rng, n):
+    return sample_without_replacement(rng, n, n, 1)[0]
@@ -0,0 +1,147 @@
+# 有状态的多轮模拟：每个买家块保存 (买家,) 形状的状态数组，在各轮之间延续
+#   remaining   剩余预算：购买后扣除（与 src/app.py 的实验相同）；carry_over 为 True 时未花完的预算
+#               带到下一轮，否则每轮开始时重置为该轮预算
+#   owned       已购房源的目录下标（每个买家最多 轮数 × max_purchases 个），已拥有的房源不会再买
+#   benchmarks  看到过的带 benchmark 的房源数量
+# 每轮每个买家看到 sample_size 个房源，最多购买 max_purchases 次：每一步所有买家同步地由 policy 在
+# 仍可购买的展示房源中选一个，选不出的买家本轮不再购买。sequential 为 True 时像实验页一样按展示顺序
+# 逐个查看，买下某个房源后只能继续买排在它后面的房源
+# 所有更新都是整块的数组运算，与无状态的 run_simulation 一样按块派生随机流，结果与进程数无关
+import numpy as np
+
+from house_sim.catalog import as_catalog
+from house_sim.engine import BLOCK_SIZE, ROUND_BUDGETS, SAMPLE_SIZE, build_results, plan_blocks
+from house_sim.parallel import map_blocks
+from house_sim.policies import NO_PURCHASE, PolicyMix, get_policy
+from house_sim.profiling import stage
+from house_sim.sampling import sample_without_replacement
+
+BUYER_COLUMNS = ['buyer', 'budget_left', 'spent', 'houses_owned', 'benchmarks_seen']
+
+
+# 房源是否带有 benchmark 参考价
+def _has_benchmark(catalog):
+    if 'benchmark' not in catalog.columns:
+        return np.zeros(len(catalog), dtype=bool)
+    return np.isfinite(np.asarray(catalog['benchmark'], dtype=np.float64))
+
+
+# 模拟一个买家块的所有轮次，返回该块的购买记录（按轮次、买家、购买顺序排列）和各买家的最终状态
+def simulate_stateful_block(catalog, size, block_seed, budgets, sample_size=SAMPLE_SIZE, policy=None,
+                            max_purchases=1, carry_over=True, sequential=False):
+    rng = np.random.default_rng(block_seed)
+    policy = get_policy(policy)
+    n = len(catalog)
+    k = min(sample_size, n)
+    max_purchases = k if max_purchases is None else min(max_purchases, k)
+    has_benchmark = _has_benchmark(catalog)
+    rows = np.arange(size)
+    positions = np.arange(k)
+
+    remaining = np.zeros(size, dtype=np.float64)
+    spent = np.zeros(size, dtype=np.float64)
+    owned = np.full((size, len(budgets) * max_purchases), NO_PURCHASE, dtype=np.intp)
+    num_owned = np.zeros(size, dtype=np.int64)
+    benchmarks = np.zeros(size, dtype=np.int64)
+    state = {}
+    round_parts, house_parts, buyer_parts = [], [], []
+
+    with stage('stateful.decide', rows=size * len(budgets)):
+        for i, budget in enumerate(budgets.values()):
+            remaining = remaining + budget if carry_over else np.full(size, budget, dtype=np.float64)
+            presented = sample_without_replacement(rng, n, k, size)
+            price = catalog.price[presented]
+            benchmarks += np.count_nonzero(has_benchmark[presented], axis=1)
+            # 以前各轮买下的房源不能再买；本轮买下的房源在下面直接从可选位置中去掉
+            filled = int(num_owned.max(initial=0))
+            available = ~(presented[:, :, None] == owned[:, None, :filled]).any(axis=2)
+            after = np.full(size, -1, dtype=np.int64)
+            for _ in range(max_purchases):
+                mask = available & (price <= remaining[:, None])
+                if sequential:
+                    mask &= positions > after[:, None]
+                if not mask.any():
+                    break
+                chosen = policy.choose(catalog, presented, mask, rng, state)
+                # 本步没有买的买家本轮不再购买
+                available[chosen < 0] = False
+                bought = rows[chosen >= 0]
+                house = chosen[bought]
+                position = (presented[bought] == house[:, None]).argmax(axis=1)
+                available[bought, position] = False
+                after[bought] = position
+                remaining[bought] -= catalog.price[house]
+                spent[bought] += catalog.price[house]
+                owned[bought, num_owned[bought]] = house
+                num_owned[bought] += 1
+                round_parts.append(np.full(len(bought), i, dtype=np.int64))
+                house_parts.append(house)
+                buyer_parts.append(bought)
+
+    round_idx = np.concatenate(round_parts or [np.empty(0, dtype=np.int64)])
+    house_idx = np.concatenate(house_parts or [np.empty(0, dtype=np.intp)])
+    buyer_idx = np.concatenate(buyer_parts or [np.empty(0, dtype=np.intp)])
+    # 各步按轮次追加，稳定排序后同一买家的多次购买保持先后顺序
+    order = np.lexsort((buyer_idx, round_idx))
+    return {
+        'round': round_idx[order], 'house': house_idx[order], 'buyer': buyer_idx[order],
+        'remaining': remaining, 'spent': spent, 'owned': num_owned, 'benchmarks': benchmarks,
+    }
+
+
+# 有状态模拟的结果：results 是与 run_simulation 相同列的购买记录，buyers 是每个买家的最终状态
+class StatefulResult:
+    def __init__(self, results, buyers):
+        self.results = results
+        self.buyers = buyers
+
+
+# 合并各块的购买记录（按轮次、买家的顺序）和买家状态
+def assemble_stateful(catalog, budgets, blocks, policy=None):
+    import pandas as pd
+
+    rounds = np.fromiter(budgets, dtype=np.int64)
+    mix = policy if isinstance(policy, PolicyMix) else None
+    with stage('results.assemble', rows=sum(len(block['house']) for _, block in blocks)):
+        choices, round_col, buyer_col, policy_col = [], [], [], []
+        for i in range(len(rounds)):
+            for start, block in blocks:
+                lo, hi = np.searchsorted(block['round'], [i, i + 1])
+                choices.append(block['house'][lo:hi])
+                round_col.append(np.full(hi - lo, rounds[i]))
+                buyer_col.append(start + 1 + block['buyer'][lo:hi])
+                if mix is not None:
+                    policy_col.append(mix.assignment(len(block['owned']))[block['buyer'][lo:hi]])
+        policies = None if mix is None else (np.concatenate(policy_col).astype(np.int8), mix.labels)
+        results = build_results(catalog, np.concatenate(choices), np.concatenate(round_col),
+                                np.concatenate(buyer_col), policies)
+
+        buyers = pd.DataFrame({
+            'buyer': np.arange(1, sum(len(block['owned']) for _, block in blocks) + 1, dtype=np.int32),
+            'budget_left': np.concatenate([block['remaining'] for _, block in blocks]),
+            'spent': np.concatenate([block['spent'] for _, block in blocks]),
+            'houses_owned': np.concatenate([block['owned'] for _, block in blocks]).astype(np.int16),
+            'benchmarks_seen': np.concatenate([block['benchmarks'] for _, block in blocks]).astype(np.int32),
+        }, columns=BUYER_COLUMNS)
+        if mix is not None:
+            codes = np.concatenate([mix.assignment(len(block['owned'])) for _, block in blocks])
+            buyers['policy'] = pd.Categorical.from_codes(codes, categories=mix.labels)
+    return StatefulResult(results, buyers)
+
+
+# 运行有状态的多轮模拟
+#   max_purchases  每个买家每轮最多购买的次数（None 表示不限，最多为展示的房源数）
+#   carry_over     未花完的预算是否带到下一轮
+#   sequential     是否按展示顺序逐个查看（买下后只能继续买后面的房源）
+def run_stateful_simulation(houses_df=None, num_buyers=5, seed=None, workers=1, sample_size=SAMPLE_SIZE,
+                            budgets=None, block_size=BLOCK_SIZE, policy=None, max_purchases=1,
+                            carry_over=True, sequential=False):
+    budgets = ROUND_BUDGETS if budgets is None else budgets
+    policy = get_policy(policy)
+    with stage('simulate.catalog'):
+        catalog = as_catalog(houses_df)
+    kwargs = {'budgets': budgets, 'sample_size': sample_size, 'policy': policy,
+              'max_purchases': max_purchases, 'carry_over': carry_over, 'sequential': sequential}
+    blocks = list(map_blocks(catalog, plan_blocks(num_buyers, seed, block_size), simulate_stateful_block,
+                             kwargs, workers))
+    return assemble_stateful(catalog, budgets, blocks, policy)
@@ -0,0 +1,183 @@
+# 房源目录的列式存储：每列和每个索引数组都是一个 .npy 文件，按内存映射打开
+# 几百万行的目录打开时只读元数据，所有 Streamlit 会话和工作进程共享操作系统的页缓存
+#
+#   catalog_dir/
+#     meta.json                       行数、类别标签、来源文件
+#     id.npy price.npy benchmark.npy  数值列
+#     tier.npy type.npy               类别编码（标签在 meta.json 中）
+#     features.offsets.npy / features.data.npy   变长文本
+#     index/*.npy                     价格排序、分组偏移等预计算索引
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from house_sim.catalog import HOUSE_COLUMNS, Catalog, CodedColumn, TextColumn, build_index
+
+STORE_VERSION = 1
+REQUIRED_COLUMNS = ['id', 'price', 'tier', 'type']
+
+
+# 读取 CSV 或 Parquet 房源文件，并检查列是否符合 id/price/tier/type/features/benchmark 结构
+def read_listings(path):
+    import pandas as pd
+
+    path = Path(path)
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        houses_df = pd.read_parquet(path)
+    elif path.suffix.lower() in ('.csv', '.gz', '.bz2', '.zip', '.xz'):
+        houses_df = pd.read_csv(path)
+    else:
+        raise ValueError(f"Unsupported catalog format: {path.name} (expected .csv or .parquet)")
+
+    missing = [name for name in REQUIRED_COLUMNS if name not in houses_df.columns]
+    if missing:
+        raise ValueError(f"Catalog {path.name} is missing required columns: {missing}")
+    if 'features' not in houses_df.columns:
+        houses_df['features'] = ''
+    if 'benchmark' not in houses_df.columns:
+        houses_df['benchmark'] = np.nan
+    return houses_df[HOUSE_COLUMNS]
+
+
+def _encode_text(values):
+    encoded = [('' if value is None or value != value else str(value)).encode() for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+# 把房源表写成列式存储（先写临时目录再重命名，读者不会看到写了一半的目录；发布方式见 _publish）
+def write_catalog(houses_df, directory, source=None):
+    directory = Path(directory)
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(dir=directory.parent, prefix=f'.{directory.name}.'))
+    (tmp / 'index').mkdir()
+
+    tiers, tier_codes = np.unique(houses_df['tier'].astype(str).to_numpy(), return_inverse=True)
+    types, type_codes = np.unique(houses_df['type'].astype(str).to_numpy(), return_inverse=True)
+    columns = {
+        'id': houses_df['id'].to_numpy(),
+        'price': houses_df['price'].to_numpy(),
+        'tier': CodedColumn(tier_codes.astype(np.min_scalar_type(max(len(tiers) - 1, 0))), tiers),
+        'type': CodedColumn(type_codes.astype(np.min_scalar_type(max(len(types) - 1, 0))), types),
+        'benchmark': houses_df['benchmark'].to_numpy(dtype=np.float64, na_value=np.nan),
+    }
+    np.save(tmp / 'id.npy', columns['id'])
+    np.save(tmp / 'price.npy', columns['price'])
+    np.save(tmp / 'tier.npy', columns['tier'].codes)
+    np.save(tmp / 'type.npy', columns['type'].codes)
+    np.save(tmp / 'benchmark.npy', columns['benchmark'])
+    offsets, data = _encode_text(houses_df['features'].to_numpy())
+    np.save(tmp / 'features.offsets.npy', offsets)
+    np.save(tmp / 'features.data.npy', data)
+
+    index = build_index(columns)
+    for name, values in index.items():
+        if name not in ('tiers', 'types', 'tier_codes', 'type_codes'):
+            np.save(tmp / 'index' / f'{name}.npy', values)
+
+    meta = {
+        'version': STORE_VERSION,
+        'rows': len(houses_df),
+        'tiers': tiers.tolist(),
+        'types': types.tolist(),
+        'source': None if source is None else {'path': str(source), **_source_stamp(source)},
+    }
+    (tmp / 'meta.json').write_text(json.dumps(meta, indent=2))
+    try:
+        _publish(tmp, directory, meta)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return directory
+
+
+def _read_meta(directory):
+    try:
+        return json.loads((Path(directory) / 'meta.json').read_text())
+    except (FileNotFoundError, NotADirectoryError, ValueError):
+        return None
+
+
+# 把写好的临时目录原子地重命名为 directory，多个会话或进程同时首次加载同一个文件时也安全：
+#   - 目标不存在时直接重命名
+#   - 目标已经是同一来源文件（大小、修改时间相同）转换出的存储：另一个写者先完成了，保留它的结果
+#   - 否则目标是过期的存储：先把它重命名挪开再放入新的，已经打开旧存储的读者通过内存映射继续读取旧文件
+def _publish(tmp, directory, meta):
+    while True:
+        try:
+            os.rename(tmp, directory)
+            return
+        except OSError:
+            # 目标是非空目录时重命名失败；其他原因（权限等）直接报错
+            if not directory.exists():
+                raise
+        if meta['source'] is not None and _read_meta(directory) == meta:
+            return
+        stale = Path(tempfile.mkdtemp(dir=directory.parent, prefix=f'.{directory.name}.stale.'))
+        try:
+            os.replace(directory, stale)
+        except FileNotFoundError:
+            # 另一个写者已经把它挪开了，重新尝试发布
+            stale.rmdir()
+            continue
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+# 以内存映射方式打开列式存储
+def open_catalog(directory):
+    directory = Path(directory)
+    meta = json.loads((directory / 'meta.json').read_text())
+    if meta.get('version') != STORE_VERSION:
+        raise ValueError(f"Catalog store {directory} has version {meta.get('version')}, "
+                         f"expected {STORE_VERSION}; re-import the source file")
+
+    def load(name):
+        return np.load(directory / f'{name}.npy', mmap_mode='r')
+
+    tiers = np.asarray(meta['tiers'])
+    types = np.asarray(meta['types'])
+    columns = {
+        'id': load('id'),
+        'price': load('price'),
+        'tier': CodedColumn(load('tier'), tiers),
+        'type': CodedColumn(load('type'), types),
+        'features': TextColumn(load('features.offsets'), load('features.data')),
+        'benchmark': load('benchmark'),
+    }
+    index = {path.stem: np.load(path, mmap_mode='r') for path in (directory / 'index').glob('*.npy')}
+    index.update({'tiers': tiers, 'tier_codes': columns['tier'].codes,
+                  'types': types, 'type_codes': columns['type'].codes})
+    return Catalog(columns, index=index, path=directory.resolve())
+
+
+def _source_stamp(path):
+    stat = Path(path).stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+# 加载房源目录：
+#   - 列式存储目录：直接内存映射打开
+#   - CSV/Parquet 文件：首次加载（或源文件变化后）转换为同目录下的 <文件名>.catalog 存储
+def load_catalog(path, store_dir=None):
+    path = Path(path)
+    if path.is_dir():
+        return open_catalog(path)
+
+    store = Path(store_dir) if store_dir is not None else path.with_name(path.name + '.catalog')
+    meta_path = store / 'meta.json'
+    if meta_path.exists():
+        meta = json.loads(meta_path.read_text())
+        source = meta.get('source') or {}
+        if meta.get('version') == STORE_VERSION and source.get('size') == _source_stamp(path)['size'] \
+                and source.get('mtime_ns') == _source_stamp(path)['mtime_ns']:
+            try:
+                return open_catalog(store)
+            except FileNotFoundError:
+                # 打开过程中存储刚好被另一个进程替换，按需要转换的情况处理
+                pass
+    write_catalog(read_listings(path), store, source=path)
+    return open_catalog(store)
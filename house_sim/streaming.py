@@ -0,0 +1,588 @@
+# 流式汇总：逐块消费模拟输出，只保留运行状态，不保存逐行结果
+# 图表所需的状态大小为 O(轮次 × 类别)；按买家统计的状态为 O(买家 × 轮次)，可以关闭
+import copy
+import hashlib
+
+import numpy as np
+
+from house_sim.catalog import as_catalog
+from house_sim.engine import BLOCK_SIZE, ROUND_BUDGETS, SAMPLE_SIZE
+from house_sim.profiling import stage, timed
+
+# 详细结果表中保留的前若干行
+HEAD_ROWS = 1000
+# 价格直方图的最大分箱数（不同价格不超过该数量时按价格精确计数）
+HISTOGRAM_BINS = 50
+
+
+# 可合并的分位数草图
+# 不同取值较少时（例如价格都来自房源目录）按取值精确计数；
+# 超过 max_exact 个取值后折叠为对数分桶，相对误差不超过 relative_accuracy
+class QuantileSketch:
+    def __init__(self, relative_accuracy=0.01, max_exact=4096):
+        self.relative_accuracy = relative_accuracy
+        self.max_exact = max_exact
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.exact = {}
+        self.buckets = None
+        self.zero_count = 0
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, values, counts=None):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        counts = np.ones(values.size, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.count += int(counts.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        if self.exact is not None:
+            self._accumulate(self.exact, values, counts)
+            if len(self.exact) > self.max_exact:
+                self._collapse()
+        else:
+            self._add_buckets(values, counts)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if other.exact is not None:
+            values = np.fromiter(other.exact.keys(), dtype=np.float64, count=len(other.exact))
+            counts = np.fromiter(other.exact.values(), dtype=np.int64, count=len(other.exact))
+            self.add(values, counts)
+            return self
+        if self.exact is not None:
+            self._collapse()
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.zero_count += other.zero_count
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        return self
+
+    # 排好序的 (取值, 计数)；分桶模式下取值为桶的代表值
+    def values_and_counts(self):
+        if self.exact is not None:
+            values = np.fromiter(self.exact.keys(), dtype=np.float64, count=len(self.exact))
+            counts = np.fromiter(self.exact.values(), dtype=np.int64, count=len(self.exact))
+        else:
+            indexes = np.fromiter(self.buckets.keys(), dtype=np.float64, count=len(self.buckets))
+            values = 2 * self.gamma ** indexes / (self.gamma + 1)
+            counts = np.fromiter(self.buckets.values(), dtype=np.int64, count=len(self.buckets))
+            if self.zero_count:
+                values = np.append(values, 0.0)
+                counts = np.append(counts, self.zero_count)
+            values = np.clip(values, self.min, self.max)
+        order = np.argsort(values)
+        return values[order], counts[order]
+
+    # 分位数（与 numpy 默认的线性插值一致）
+    def quantile(self, q):
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+        values, counts = self.values_and_counts()
+        cumulative = np.cumsum(counts)
+        position = q * (self.count - 1)
+        lower = values[np.searchsorted(cumulative, np.floor(position), side='right')]
+        upper = values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+        return lower + (upper - lower) * (position - np.floor(position))
+
+    # 箱线图统计：四分位数和须线（1.5 倍四分位距以内的最远取值）
+    def box_stats(self):
+        if self.count == 0:
+            return None
+        q1, median, q3 = self.quantile([0.25, 0.5, 0.75])
+        values, _ = self.values_and_counts()
+        iqr = q3 - q1
+        inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+        return {'q1': q1, 'median': median, 'q3': q3,
+                'lowerfence': inside.min(), 'upperfence': inside.max(),
+                'min': self.min, 'max': self.max, 'count': self.count}
+
+    @staticmethod
+    def _accumulate(table, keys, counts):
+        unique, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=counts).astype(np.int64)
+        for key, total in zip(unique.tolist(), totals.tolist()):
+            table[key] = table.get(key, 0) + total
+
+    def _add_buckets(self, values, counts):
+        positive = values > 0
+        self.zero_count += int(counts[~positive].sum())
+        indexes = np.ceil(np.log(values[positive]) / self.log_gamma).astype(np.int64)
+        self._accumulate(self.buckets, indexes, counts[positive])
+
+    def _collapse(self):
+        values = np.fromiter(self.exact.keys(), dtype=np.float64, count=len(self.exact))
+        counts = np.fromiter(self.exact.values(), dtype=np.int64, count=len(self.exact))
+        self.exact = None
+        self.buckets = {}
+        self._add_buckets(values, counts)
+
+
+# 由逐行结果中出现的房源构建目录；同一个房源在结果中的价格、层级或类型不一致时报错
+def houses_from_results(results_df):
+    import pandas as pd
+
+    houses = pd.DataFrame({
+        'id': results_df['house_id'].to_numpy(),
+        'price': results_df['price'].to_numpy(),
+        'tier': results_df['tier'].astype(str).to_numpy(),
+        'type': results_df['type'].astype(str).to_numpy(),
+    }).drop_duplicates()
+    if houses['id'].duplicated().any():
+        raise ValueError("Results list the same house_id with different price, tier or type; "
+                         "pass the catalog that produced them")
+    return houses.sort_values('id', kind='stable').reset_index(drop=True)
+
+
+# 模拟结果的增量汇总器
+class StreamingAggregator:
+    def __init__(self, houses_df=None, budgets=None, track_buyers=True, head_rows=HEAD_ROWS,
+                 relative_accuracy=0.01):
+        self.catalog = as_catalog(houses_df)
+        self.budgets = dict(ROUND_BUDGETS if budgets is None else budgets)
+        self.rounds = np.fromiter(self.budgets, dtype=np.int64)
+        self.track_buyers = track_buyers
+        self.head_rows = head_rows
+
+        # 层级和类型的整数编码来自目录索引
+        self.tiers, self.tier_codes = self.catalog.tiers, self.catalog.tier_codes
+        self.types, self.type_codes = self.catalog.types, self.catalog.type_codes
+
+        num_rounds = len(self.rounds)
+        self.rows = 0
+        self.tier_count = np.zeros((num_rounds, len(self.tiers)), dtype=np.int64)
+        self.type_count = np.zeros((num_rounds, len(self.types)), dtype=np.int64)
+        self.price_sum = np.zeros(num_rounds)
+        self.price_sumsq = np.zeros(num_rounds)
+        self.price_sketch = [QuantileSketch(relative_accuracy) for _ in range(num_rounds)]
+
+        # 按买家的状态（买家编号从 1 开始，第 0 行不使用）
+        self.num_buyers = 0
+        self.buyer_spent = np.zeros((0, num_rounds))
+        self.buyer_count = np.zeros((0, num_rounds), dtype=np.int32)
+        self.buyer_first = np.zeros((0, num_rounds), dtype=np.int32)
+        self.buyer_tier = np.zeros((0, len(self.tiers)), dtype=np.int32)
+        self.buyer_type = np.zeros((0, len(self.types)), dtype=np.int32)
+        self._head = []
+        self._head_size = 0
+        self._fingerprint = None
+
+    # 消费引擎输出的决策矩阵（轮次 × 买家，-1 表示未购买）
+    def update(self, decided, buyer_start=0):
+        bought = decided >= 0
+        round_idx = np.broadcast_to(np.arange(decided.shape[0])[:, None], decided.shape)[bought]
+        buyers = np.broadcast_to(np.arange(buyer_start + 1, buyer_start + decided.shape[1] + 1),
+                                 decided.shape)[bought]
+        self.update_rows(round_idx, decided[bought], buyers)
+        return self
+
+    # 消费逐行结果块（列与 run_simulation 的结果相同）
+    # 结果必须来自本汇总器的目录和轮次：目录中没有的房源、价格与目录不同的行或未知的轮次直接报错
+    def update_frame(self, chunk):
+        rounds = chunk['round'].to_numpy()
+        house_id = chunk['house_id'].to_numpy()
+        round_idx = np.minimum(np.searchsorted(self.rounds, rounds), len(self.rounds) - 1)
+        house_idx = self.catalog.index_of(house_id)
+        unknown = self.catalog.id[house_idx] != house_id
+        if unknown.any():
+            raise ValueError(f"{np.count_nonzero(unknown)} result rows reference houses that are not in the "
+                             f"catalog (e.g. house_id {house_id[unknown][0]}); pass the catalog that produced "
+                             f"the results")
+        mismatched = self.catalog.price[house_idx] != chunk['price'].to_numpy()
+        if mismatched.any():
+            raise ValueError(f"{np.count_nonzero(mismatched)} result rows have prices that differ from the catalog "
+                             f"(e.g. house_id {house_id[mismatched][0]}); pass the catalog that produced the results")
+        unknown = self.rounds[round_idx] != rounds
+        if unknown.any():
+            raise ValueError(f"Result rows contain rounds {sorted(set(rounds[unknown].tolist()))} that are not in "
+                             f"the budgets (rounds {self.rounds.tolist()})")
+        self.update_rows(round_idx, house_idx, chunk['buyer'].to_numpy())
+        return self
+
+    # 核心更新：每行为 (轮次下标, 房源下标, 买家编号)
+    def update_rows(self, round_idx, house_idx, buyers):
+        if len(house_idx) == 0:
+            return self
+        with stage('aggregate.update', rows=len(house_idx)):
+            self._update_rows(round_idx, house_idx, buyers)
+        return self
+
+    def _update_rows(self, round_idx, house_idx, buyers):
+        num_rounds = len(self.rounds)
+        prices = self.catalog['price'][house_idx].astype(np.float64)
+        tiers = self.tier_codes[house_idx]
+        types = self.type_codes[house_idx]
+        self.rows += len(house_idx)
+        self._fingerprint = None
+
+        self.tier_count += np.bincount(round_idx * len(self.tiers) + tiers,
+                                       minlength=self.tier_count.size).reshape(self.tier_count.shape)
+        self.type_count += np.bincount(round_idx * len(self.types) + types,
+                                       minlength=self.type_count.size).reshape(self.type_count.shape)
+        self.price_sum += np.bincount(round_idx, weights=prices, minlength=num_rounds)
+        self.price_sumsq += np.bincount(round_idx, weights=prices * prices, minlength=num_rounds)
+        for i in np.unique(round_idx):
+            self.price_sketch[i].add(prices[round_idx == i])
+
+        if self.track_buyers:
+            self._update_buyers(round_idx, house_idx, buyers, prices, tiers, types)
+        self._update_head(round_idx, house_idx, buyers)
+
+    def _update_buyers(self, round_idx, house_idx, buyers, prices, tiers, types):
+        self._reserve(int(buyers.max()))
+        # 一个块内的买家编号是连续区间，只在该区间内用 bincount 累加
+        low = int(buyers.min())
+        local = buyers - low
+        span = int(local.max()) + 1
+        stop = low + span
+
+        def add(target, columns, weights=None):
+            width = target.shape[1]
+            counts = np.bincount(local * width + columns, weights=weights, minlength=span * width)
+            target[low:stop] += counts.reshape(span, width).astype(target.dtype)
+
+        # 每个 (买家, 轮次) 记录第一次购买的房源
+        cell = local.astype(np.int64) * len(self.rounds) + round_idx
+        _, first_row = np.unique(cell, return_index=True)
+        first_row = first_row[self.buyer_count[buyers[first_row], round_idx[first_row]] == 0]
+        self.buyer_first[buyers[first_row], round_idx[first_row]] = house_idx[first_row]
+
+        add(self.buyer_spent, round_idx, prices)
+        add(self.buyer_count, round_idx)
+        add(self.buyer_tier, tiers)
+        add(self.buyer_type, types)
+
+    def _reserve(self, max_buyer):
+        self.num_buyers = max(self.num_buyers, max_buyer)
+        capacity = len(self.buyer_spent)
+        if max_buyer < capacity:
+            return
+        new_capacity = max(max_buyer + 1, capacity * 2)
+
+        def grow(array, fill=0):
+            grown = np.full((new_capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            grown[:capacity] = array
+            return grown
+
+        self.buyer_spent = grow(self.buyer_spent)
+        self.buyer_count = grow(self.buyer_count)
+        self.buyer_first = grow(self.buyer_first, -1)
+        self.buyer_tier = grow(self.buyer_tier)
+        self.buyer_type = grow(self.buyer_type)
+
+    def _update_head(self, round_idx, house_idx, buyers):
+        remaining = self.head_rows - self._head_size
+        if remaining <= 0:
+            return
+        self._head.append((round_idx[:remaining], house_idx[:remaining], buyers[:remaining]))
+        self._head_size += min(remaining, len(house_idx))
+
+    # 复制汇总状态（共享只读的房源目录），用于在后台更新时安全地读取部分结果
+    def copy(self):
+        clone = copy.copy(self)
+        for name in ('tier_count', 'type_count', 'price_sum', 'price_sumsq', 'buyer_spent',
+                     'buyer_count', 'buyer_first', 'buyer_tier', 'buyer_type'):
+            setattr(clone, name, getattr(self, name).copy())
+        clone.price_sketch = copy.deepcopy(self.price_sketch)
+        clone._head = list(self._head)
+        return clone
+
+    # 合并另一个汇总器（例如其他进程的结果）；两者的买家编号应互不重叠或属于同一批买家
+    def merge(self, other):
+        self.rows += other.rows
+        self._fingerprint = None
+        self.tier_count += other.tier_count
+        self.type_count += other.type_count
+        self.price_sum += other.price_sum
+        self.price_sumsq += other.price_sumsq
+        for mine, theirs in zip(self.price_sketch, other.price_sketch):
+            mine.merge(theirs)
+        if self.track_buyers and other.track_buyers and other.num_buyers:
+            n = other.num_buyers + 1
+            self._reserve(other.num_buyers)
+            first = self.buyer_first[:n]
+            take = (self.buyer_count[:n] == 0) & (other.buyer_count[:n] > 0)
+            first[take] = other.buyer_first[:n][take]
+            self.buyer_spent[:n] += other.buyer_spent[:n]
+            self.buyer_count[:n] += other.buyer_count[:n]
+            self.buyer_tier[:n] += other.buyer_tier[:n]
+            self.buyer_type[:n] += other.buyer_type[:n]
+        for part in other._head:
+            self._update_head(*part)
+        return self
+
+    # 由逐行结果构建汇总器；houses_df 应为产生这些结果的目录，未指定时由结果中出现的房源
+    # （id、价格、层级、类型）构建目录，没有被购买过的房源和层级不会出现在汇总中
+    @classmethod
+    def from_frame(cls, results_df, houses_df=None, budgets=None, **kwargs):
+        if houses_df is None:
+            houses_df = houses_from_results(results_df)
+        aggregator = cls(houses_df, budgets, **kwargs)
+        return aggregator.update_frame(results_df)
+
+    # 汇总状态的指纹，用作图表缓存的键；状态不变时只计算一次，更新或合并后重新计算
+    @timed('aggregate.fingerprint')
+    def fingerprint(self):
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(repr((self.rows, self.num_buyers, self.budgets, self.track_buyers,
+                                len(self.catalog), str(self.catalog.path),
+                                self.tiers.tolist(), self.types.tolist())).encode())
+            arrays = [self.tier_count, self.type_count, self.price_sum, self.price_sumsq]
+            for sketch in self.price_sketch:
+                arrays.extend(sketch.values_and_counts())
+            if self.track_buyers:
+                n = self.num_buyers + 1
+                arrays += [self.buyer_spent[:n], self.buyer_count[:n], self.buyer_first[:n],
+                           self.buyer_tier[:n], self.buyer_type[:n]]
+            for array in arrays:
+                digest.update(np.ascontiguousarray(array))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    # ---- 输出：与 aggregate 模块中基于 DataFrame 的表格一致 ----
+
+    def _count_table(self, counts, labels, name):
+        import pandas as pd
+
+        has_rows = counts.sum(axis=1) > 0
+        observed = counts.sum(axis=0) > 0
+        table = pd.DataFrame(counts[has_rows][:, observed],
+                             index=pd.Index(self.rounds[has_rows], name='round'),
+                             columns=pd.Index(labels[observed], name=name))
+        return table
+
+    # 各轮次的层级分布
+    @timed('aggregate.tier_counts')
+    def tier_counts(self):
+        return self._count_table(self.tier_count, self.tiers, 'tier')
+
+    # 各轮次的类型分布
+    @timed('aggregate.type_counts')
+    def type_counts(self):
+        return self._count_table(self.type_count, self.types, 'type')
+
+    # 各轮次的价格统计（均值、标准差、箱线图统计）
+    @timed('aggregate.price_stats')
+    def price_stats(self):
+        import pandas as pd
+
+        rows = []
+        for round_num, total, sumsq, sketch in zip(self.rounds, self.price_sum, self.price_sumsq,
+                                                   self.price_sketch):
+            stats = sketch.box_stats()
+            if stats is None:
+                continue
+            n = stats['count']
+            mean = total / n
+            variance = (sumsq - n * mean * mean) / (n - 1) if n > 1 else 0.0
+            rows.append({'round': round_num, 'mean': mean, 'std': np.sqrt(max(variance, 0.0)), **stats})
+        return pd.DataFrame(rows, columns=['round', 'count', 'mean', 'std', 'min', 'lowerfence', 'q1',
+                                           'median', 'q3', 'upperfence', 'max'])
+
+    # 各轮次的价格直方图（服务端分箱，输出大小与行数无关）
+    # 不同价格不超过 max_bins 个时每个价格一根柱子，否则在所有轮次共用的等宽分箱上计数
+    @timed('aggregate.price_histogram')
+    def price_histogram(self, max_bins=HISTOGRAM_BINS):
+        import pandas as pd
+
+        parts = [(round_num,) + sketch.values_and_counts()
+                 for round_num, sketch in zip(self.rounds, self.price_sketch) if sketch.count]
+        columns = ['round', 'price', 'width', 'count']
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        distinct = np.unique(np.concatenate([values for _, values, _ in parts]))
+        if len(distinct) > max_bins:
+            edges = np.histogram_bin_edges(distinct, bins=max_bins)
+            centers, widths = (edges[:-1] + edges[1:]) / 2, np.diff(edges)
+        else:
+            width = np.diff(distinct).min() * 0.8 if len(distinct) > 1 else 1.0
+
+        tables = []
+        for round_num, values, counts in parts:
+            if len(distinct) > max_bins:
+                binned, _ = np.histogram(values, bins=edges, weights=counts)
+                keep = binned > 0
+                values, counts, width_col = centers[keep], binned[keep].astype(np.int64), widths[keep]
+            else:
+                width_col = np.full(len(values), width)
+            tables.append(pd.DataFrame({'round': round_num, 'price': values,
+                                        'width': width_col, 'count': counts}))
+        return pd.concat(tables, ignore_index=True)[columns]
+
+    # 各轮次买家平均成交价的分布（均值和分位数），买家很多时代替逐买家的折线
+    @timed('aggregate.price_trend_bands')
+    def price_trend_bands(self, quantiles=(0.1, 0.5, 0.9)):
+        import pandas as pd
+
+        n = self.num_buyers + 1
+        counts, spent = self.buyer_count[:n], self.buyer_spent[:n]
+        names = [f'p{round(q * 100)}' for q in quantiles]
+        rows = []
+        for i, round_num in enumerate(self.rounds):
+            bought = counts[:, i] > 0
+            if not bought.any():
+                continue
+            prices = spent[bought, i] / counts[bought, i]
+            rows.append({'round': round_num, 'buyers': int(bought.sum()), 'mean': prices.mean(),
+                         **dict(zip(names, np.quantile(prices, quantiles)))})
+        return pd.DataFrame(rows, columns=['round', 'buyers', 'mean'] + names)
+
+    # 买家偏好百分比的分布：每个类别下，选择该类别的比例落在各区间内的买家数量
+    @timed('aggregate.preference_distribution')
+    def preference_distribution(self, column, bins=20):
+        import pandas as pd
+
+        pct = self.preference_pct(column)
+        edges = np.linspace(0, 100, bins + 1)
+        index = pd.Index([f'{low:.0f}-{high:.0f}%' for low, high in zip(edges[:-1], edges[1:])],
+                         name='share')
+        return pd.DataFrame({label: np.histogram(pct[label].to_numpy(), bins=edges)[0]
+                             for label in pct.columns},
+                            index=index).rename_axis(columns=column)
+
+    def _buyer_rows(self):
+        counts = self.buyer_count[:self.num_buyers + 1]
+        return np.nonzero(counts.sum(axis=1) > 0)[0]
+
+    # 买家预算使用率
+    @timed('aggregate.budget_utilization')
+    def budget_utilization(self):
+        import pandas as pd
+
+        counts = self.buyer_count[:self.num_buyers + 1]
+        buyers, round_idx = np.nonzero(counts > 0)
+        spent = self.buyer_spent[buyers, round_idx]
+        budgets = np.array([self.budgets[r] for r in self.rounds], dtype=np.float64)[round_idx]
+        utilization = pd.DataFrame({
+            'Buyer': buyers,
+            'Round': self.rounds[round_idx],
+            'Total Spent': spent,
+            'Average Price': spent / counts[buyers, round_idx],
+            'Budget': budgets,
+        })
+        utilization['Utilization Rate'] = (utilization['Total Spent'] / utilization['Budget'] * 100).round(1)
+        return utilization
+
+    # 各轮次的平均预算使用率（只统计该轮有购买的买家），大小与买家数量无关
+    # first_purchase 为 True 时只计每个买家在该轮的第一次购买：实验页的参与者每轮可以买多次，
+    # 这样与每轮最多购买一次的模拟买家口径相同（模拟结果两种算法的结果一样）
+    @timed('aggregate.utilization_by_round')
+    def utilization_by_round(self, first_purchase=False):
+        import pandas as pd
+
+        counts = self.buyer_count[:self.num_buyers + 1]
+        buyers = (counts > 0).sum(axis=0)
+        bought = buyers > 0
+        budgets = np.array([self.budgets[r] for r in self.rounds], dtype=np.float64)
+        if first_purchase:
+            first = self.catalog.price[self.buyer_first[:self.num_buyers + 1]]
+            spent = np.where(counts > 0, first, 0).sum(axis=0, dtype=np.float64)
+        else:
+            spent = self.price_sum
+        avg_spent = spent[bought] / buyers[bought]
+        return pd.DataFrame({
+            'round': self.rounds[bought],
+            'buyers': buyers[bought],
+            'avg_spent': avg_spent,
+            'budget': budgets[bought],
+            'utilization': avg_spent / budgets[bought] * 100,
+        })
+
+    # 每个买家选择某类型/层级的百分比
+    @timed('aggregate.preference_pct')
+    def preference_pct(self, column):
+        import pandas as pd
+
+        counts, labels = ((self.buyer_tier, self.tiers) if column == 'tier'
+                          else (self.buyer_type, self.types))
+        buyers = self._buyer_rows()
+        counts = counts[buyers]
+        observed = counts.sum(axis=0) > 0
+        counts = counts[:, observed]
+        return pd.DataFrame(counts / counts.sum(axis=1, keepdims=True) * 100,
+                            index=pd.Index(buyers, name='buyer'),
+                            columns=pd.Index(labels[observed], name=column))
+
+    # 每个买家各轮的平均成交价
+    @timed('aggregate.price_trend')
+    def price_trend(self):
+        import pandas as pd
+
+        counts = self.buyer_count[:self.num_buyers + 1]
+        buyers, round_idx = np.nonzero(counts > 0)
+        return pd.DataFrame({
+            'buyer': buyers,
+            'round': self.rounds[round_idx],
+            'price': self.buyer_spent[buyers, round_idx] / counts[buyers, round_idx],
+        })
+
+    # 每个买家的行为总结（出现次数相同时取字母序靠前的类别，与 mode() 一致）
+    @timed('aggregate.buyer_summary')
+    def buyer_summary(self):
+        import pandas as pd
+
+        buyers = self._buyer_rows()
+        total_spent = self.buyer_spent[buyers].sum(axis=1)
+        purchases = self.buyer_count[buyers].sum(axis=1)
+        return pd.DataFrame({
+            'buyer': buyers,
+            'total_spent': total_spent,
+            'avg_price': total_spent / purchases,
+            'preferred_type': self.types[self.buyer_type[buyers].argmax(axis=1)],
+            'preferred_tier': self.tiers[self.buyer_tier[buyers].argmax(axis=1)],
+        })
+
+    # 买家选择模式：每个买家每轮的（第一次）选择
+    @timed('aggregate.buyer_patterns')
+    def buyer_patterns(self):
+        import pandas as pd
+
+        buyers = self._buyer_rows()
+        first = self.buyer_first[buyers]
+        columns = {('buyer', ''): buyers}
+        for name in ('price', 'tier', 'type'):
+            values = self.catalog[name]
+            for i, round_num in enumerate(self.rounds):
+                chosen = first[:, i]
+                if (chosen >= 0).any():
+                    column = values[np.maximum(chosen, 0)].astype(object)
+                    column[chosen < 0] = None
+                    columns[(name, round_num)] = column
+        patterns = pd.DataFrame(columns)
+        patterns.columns.names = [None, 'round']
+        return patterns
+
+    # 详细结果表的前若干行
+    @timed('aggregate.head')
+    def head(self):
+        from house_sim.engine import build_results
+
+        if not self._head:
+            return build_results(self.catalog, np.empty(0, dtype=np.intp),
+                                 np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        round_idx, house_idx, buyers = (np.concatenate(part) for part in zip(*self._head))
+        return build_results(self.catalog, house_idx, self.rounds[round_idx], buyers.astype(np.int64))
+
+
+# 流式运行模拟：每完成一个买家块就更新汇总器，逐行结果从不完整保存
+def run_simulation_streaming(houses_df=None, num_buyers=5, seed=None, workers=1,
+                             sample_size=SAMPLE_SIZE, budgets=None, block_size=BLOCK_SIZE,
+                             track_buyers=True, policy=None):
+    from house_sim.parallel import iter_blocks
+
+    with stage('simulate.catalog'):
+        catalog = as_catalog(houses_df)
+    budgets = ROUND_BUDGETS if budgets is None else budgets
+    aggregator = StreamingAggregator(catalog, budgets, track_buyers=track_buyers)
+    for start, decided in iter_blocks(catalog, num_buyers, seed, workers, sample_size, budgets,
+                                      block_size, policy):
+        aggregator.update(decided, start)
+    return aggregator
@@ -0,0 +1,140 @@
+# 参数网格扫描：每个网格单元的结果按 (参数 + 种子 + 房源目录) 的哈希缓存到磁盘，
+# 缓存总大小有上限，超出时按最近最少使用 (LRU) 的顺序淘汰
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from house_sim.catalog import as_catalog
+from house_sim.engine import SAMPLE_SIZE, round_budgets
+from house_sim.parallel import run_simulation_parallel
+
+# 引擎的结果格式或随机流发生变化时递增，使旧缓存失效
+CACHE_VERSION = 3
+DEFAULT_CACHE_DIR = Path(os.environ.get('HOUSE_SIM_CACHE_DIR', Path.home() / '.cache' / 'house_sim'))
+DEFAULT_MAX_BYTES = 1 << 30
+
+# 每个网格单元的默认参数（与模拟页的设置一致）
+DEFAULT_PARAMS = {
+    'num_buyers': 5,
+    'sample_size': SAMPLE_SIZE,
+    'num_rounds': 3,
+    'first_budget': 100,
+    'later_budget': 150,
+    'policy': 'random',
+}
+
+
+# 房源目录的指纹：只包含影响模拟结果的列（benchmark 由锚定策略读取）
+def catalog_fingerprint(houses_df):
+    import numpy as np
+    import pandas as pd
+
+    catalog = as_catalog(houses_df)
+    columns = pd.DataFrame({name: catalog[name] for name in ('id', 'price', 'tier', 'type')})
+    if 'benchmark' in catalog.columns:
+        columns['benchmark'] = np.asarray(catalog['benchmark'], dtype=np.float64)
+    return hashlib.sha256(pd.util.hash_pandas_object(columns, index=False).to_numpy().tobytes()).hexdigest()
+
+
+# 缓存键：参数、种子、目录指纹和缓存版本的哈希
+def cache_key(params, seed, fingerprint):
+    payload = json.dumps({'params': params, 'seed': seed, 'catalog': fingerprint,
+                          'version': CACHE_VERSION}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# 磁盘结果缓存，按文件访问时间实现 LRU 淘汰
+class ResultCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.directory / f'{key}.pkl'
+
+    def get(self, key):
+        import pandas as pd
+
+        path = self._path(key)
+        try:
+            results = pd.read_pickle(path)
+        except (FileNotFoundError, EOFError):
+            return None
+        # 更新修改时间，标记为最近使用
+        path.touch()
+        return results
+
+    def put(self, key, results):
+        # 先写临时文件再原子替换，并发的扫描不会读到写了一半的文件
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        results.to_pickle(tmp)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    # 总大小超过上限时，从最久未使用的文件开始删除
+    def evict(self):
+        entries = []
+        for path in self.directory.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def size(self):
+        return sum(path.stat().st_size for path in self.directory.glob('*.pkl'))
+
+    def clear(self):
+        for path in self.directory.glob('*.pkl'):
+            path.unlink(missing_ok=True)
+
+
+# 展开参数网格，例如 {'num_buyers': [5, 6], 'later_budget': [150, 200]}
+def expand_grid(grid):
+    unknown = set(grid) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield {**DEFAULT_PARAMS, **dict(zip(names, values))}
+
+
+# 运行一个网格单元（命中缓存时直接返回）
+def run_cell(houses_df, params, seed, cache=None, fingerprint=None, workers=1):
+    key = None
+    if cache is not None:
+        key = cache_key(params, seed, fingerprint or catalog_fingerprint(houses_df))
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    results = run_simulation_parallel(
+        houses_df, num_buyers=params['num_buyers'], seed=seed, workers=workers,
+        sample_size=params['sample_size'], policy=params['policy'],
+        budgets=round_budgets(params['num_rounds'], params['first_budget'], params['later_budget']))
+
+    if cache is not None:
+        cache.put(key, results)
+    return results
+
+
+# 在参数网格上扫描，返回 [(参数, 结果表), ...]
+# seed 为 None 时每次运行的随机流都不同，结果不会写入缓存
+def sweep(grid, houses_df=None, seed=0, cache=None, workers=1):
+    houses_df = as_catalog(houses_df)
+    if seed is None:
+        cache = None
+    fingerprint = catalog_fingerprint(houses_df) if cache is not None else None
+    return [(params, run_cell(houses_df, params, seed, cache, fingerprint, workers))
+            for params in expand_grid(grid)]
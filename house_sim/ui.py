@@ -0,0 +1,340 @@
+# 模拟结果的 Streamlit 展示（各页面共用）
+# 只有页面脚本会导入这个模块，house_sim 核心本身不依赖 Streamlit/Plotly
+# 所有图表都由 StreamingAggregator 的汇总状态绘制，不需要完整的逐行结果
+import contextlib
+import os
+import uuid
+
+import numpy as np
+import streamlit as st
+
+from house_sim.bootstrap import REPLICATES, behavior_intervals
+from house_sim.catalog import as_catalog, create_catalog
+from house_sim.charts import build_figures
+from house_sim.cohort import CohortView
+from house_sim.convergence import CONFIDENCE
+from house_sim.events import EventLog
+from house_sim.jobs import JobManager
+from house_sim.profiling import Profiler, count, stage
+from house_sim.streaming import StreamingAggregator, run_simulation_streaming
+
+
+# 进程内共享的后台任务管理器：页面重跑、会话之间都使用同一个实例
+@st.cache_resource
+def job_manager():
+    return JobManager()
+
+
+# 进程内共享的实验事件日志（后台线程批量写入 SQLite）
+@st.cache_resource
+def event_log():
+    return EventLog()
+
+
+# 本会话的 id，首次调用时生成
+def session_id():
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+
+# 给本会话记录一个事件（只入队，不等待写入）
+def log_event(event, **fields):
+    event_log().record(session_id(), event, **fields)
+
+
+# 设置后各页面默认从这个文件（CSV/Parquet 或列存储目录）加载房源目录
+CATALOG_ENV = 'HOUSE_SIM_CATALOG'
+
+
+# 进程内共享的只读房源目录：所有会话、所有重跑共用同一份数据和索引
+# source 为房源数量或文件路径；为 None 时使用 HOUSE_SIM_CATALOG 或默认示例目录
+@st.cache_resource(show_spinner=False)
+def shared_catalog(source=None):
+    source = os.environ.get(CATALOG_ENV) if source is None else source
+    if source is None or isinstance(source, int):
+        catalog = create_catalog() if source is None else create_catalog(source)
+    else:
+        catalog = as_catalog(source)
+    return catalog.freeze()
+
+
+# 会话里只保存目录下标的排列，按目录大小选用最小的整数类型
+def compact_indices(indices, size):
+    return np.asarray(indices, dtype=np.min_scalar_type(max(size - 1, 0)))
+
+
+# 进程内共享的真实参与者汇总视图，页面每次加载时只处理新事件
+@st.cache_resource
+def cohort_view():
+    return CohortView(event_log().path, shared_catalog())
+
+
+# 对比用的模拟买家（相同参数的会话共享同一份结果）
+@st.cache_resource(max_entries=8, show_spinner="Simulating buyers...")
+def simulated_cohort(num_buyers, seed):
+    return run_simulation_streaming(shared_catalog(), num_buyers=num_buyers, seed=seed)
+
+
+# 局部重跑：新版 Streamlit 提供 st.fragment（1.33-1.36 为 st.experimental_fragment），
+# 片段内的控件只重跑该片段；旧版本没有时退化为普通函数，控件仍然触发整页重跑
+# requirements.txt 固定的 1.32.0 没有片段，升级到 1.37 及以上才会局部重跑
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+FRAGMENTS = _fragment is not None
+
+
+def fragment(func):
+    return func if _fragment is None else _fragment(func)
+
+
+# 片段里的操作需要更新片段之外的内容时触发整页重跑；没有片段时本次运行已经是整页重跑
+def rerun_app():
+    if FRAGMENTS:
+        st.rerun()
+
+
+# 按结果指纹缓存图表：数据没有变化的重跑直接复用已经构建好的图表
+# 汇总器本身不参与缓存键的哈希（参数名以下划线开头），由指纹代表它的状态
+# 用 cache_resource 直接共享 Figure 对象（只读），避免 cache_data 每次重跑都反序列化图表
+@st.cache_resource(max_entries=32, show_spinner=False)
+def cached_figures(fingerprint, _results, behavior_analysis=True, first_purchase=False):
+    count('render.figure_cache_miss')
+    with stage('render.figures'):
+        return build_figures(_results, behavior_analysis, first_purchase)
+
+
+# 买家行为分析表格的 bootstrap 置信区间，与图表一样按结果指纹缓存
+@st.cache_resource(max_entries=32, show_spinner="Computing confidence intervals...")
+def cached_intervals(fingerprint, _results):
+    with stage('render.intervals', rows=_results.num_buyers):
+        return behavior_intervals(_results)
+
+
+# 点估计和置信区间表格：列名为 [index 列名, 估计值列名]，区间列为 Lower/Upper
+def interval_table(table, index, estimate):
+    return table.set_axis([index, estimate, 'Lower', 'Upper'], axis=1).round(2)
+
+
+# 图表和表格发送到前端前的序列化（Plotly JSON、Arrow）也计入耗时
+def plotly_chart(figure, **kwargs):
+    with stage('render.plotly'):
+        st.plotly_chart(figure, **kwargs)
+
+
+def dataframe(table, **kwargs):
+    with stage('render.dataframe', rows=len(table)):
+        st.dataframe(table, **kwargs)
+
+
+# 显示模拟结果（results 可以是 StreamingAggregator 或逐行结果 DataFrame）
+def show_simulation_results(results, selection_patterns=True, behavior_analysis=True):
+    if not isinstance(results, StreamingAggregator):
+        with stage('render.from_frame', rows=len(results)):
+            results = StreamingAggregator.from_frame(results)
+
+    st.write("## Simulation Results")
+
+    figures = cached_figures(results.fingerprint(), results, behavior_analysis)
+
+    # 1. 价格分布
+    st.write("### Price Distribution by Round")
+    plotly_chart(figures['price_box'])
+    plotly_chart(figures['price_histogram'])
+
+    # 2. 层级分布
+    st.write("### Tier Distribution by Round")
+    plotly_chart(figures['tier'])
+
+    # 3. 类型分布
+    st.write("### Property Type Distribution by Round")
+    plotly_chart(figures['type'])
+
+    # 4. 买家选择模式
+    if selection_patterns and results.track_buyers:
+        st.write("### Buyer Selection Patterns")
+        dataframe(results.buyer_patterns())
+
+    # 5. 详细数据表格（只保留前若干行）
+    st.write("### Detailed Results")
+    if results.rows > results.head_rows:
+        st.caption(f"Showing the first {results.head_rows:,} of {results.rows:,} rows")
+    dataframe(results.head())
+
+    if behavior_analysis and results.track_buyers:
+        show_behavior_analysis(results, figures)
+
+
+# 买家行为分析部分
+def show_behavior_analysis(results, figures=None):
+    if figures is None:
+        figures = cached_figures(results.fingerprint(), results)
+    intervals = cached_intervals(results.fingerprint(), results) if results.rows else None
+    st.write("## Buyer Behavior Analysis")
+
+    with st.expander("Buyer Behavior Analysis", expanded=True):
+        if intervals is not None:
+            st.caption(f"Intervals are {CONFIDENCE:.0%} bootstrap confidence intervals over buyers "
+                       f"({REPLICATES:,} replicates)")
+
+        # 1. 买家预算使用率
+        st.write("### Budget Utilization")
+        plotly_chart(figures['utilization'])
+        if intervals is not None:
+            dataframe(interval_table(intervals['utilization'], 'Round', 'Utilization (%)'), hide_index=True)
+        dataframe(results.budget_utilization())
+
+        # 2. 买家偏好分析
+        st.write("### Buyer Preferences")
+
+        # 类型偏好
+        st.write("#### Type Preferences by Buyer")
+        plotly_chart(figures['type_pref'])
+
+        # 层级偏好
+        st.write("#### Tier Preferences by Buyer")
+        plotly_chart(figures['tier_pref'])
+
+        # 3. 价格趋势
+        st.write("### Price Trends")
+        plotly_chart(figures['price_trend'])
+        if intervals is not None:
+            dataframe(interval_table(intervals['price_trend'], 'Round', 'Average Price'), hide_index=True)
+
+        # 4. 买家行为总结
+        st.write("### Buyer Behavior Summary")
+        if intervals is not None:
+            dataframe(interval_table(intervals['summary'], 'Statistic', 'Estimate'), hide_index=True)
+        show_buyer_summary(cached_buyer_summary(results.fingerprint(), results))
+
+
+# 买家行为总结表按结果指纹缓存，翻页、排序、筛选的重跑不重新计算
+@st.cache_resource(max_entries=32, show_spinner=False)
+def cached_buyer_summary(fingerprint, _results):
+    return _results.buyer_summary()
+
+
+BUYER_SUMMARY_COLUMNS = {
+    'buyer': 'Buyer',
+    'total_spent': 'Total Spent ($)',
+    'avg_price': 'Average Price ($)',
+    'preferred_type': 'Preferred Type',
+    'preferred_tier': 'Preferred Tier',
+}
+PAGE_SIZES = (25, 50, 100, 250)
+
+
+# 分页的买家行为总结：筛选、排序只在数组上进行，每次只渲染当前页
+def show_buyer_summary(summary, key='buyer_summary'):
+    if summary.empty:
+        st.info("No purchases to summarize")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    types = col1.multiselect("Preferred type", sorted(summary['preferred_type'].unique()), key=f'{key}_type')
+    tiers = col2.multiselect("Preferred tier", sorted(summary['preferred_tier'].unique()), key=f'{key}_tier')
+    labels = {label: column for column, label in BUYER_SUMMARY_COLUMNS.items()}
+    sort_by = labels[col3.selectbox("Sort by", list(labels), key=f'{key}_sort')]
+    descending = col4.checkbox("Descending", key=f'{key}_descending')
+
+    with stage('render.buyer_summary', rows=len(summary)):
+        keep = np.ones(len(summary), dtype=bool)
+        if types:
+            keep &= summary['preferred_type'].isin(types).to_numpy()
+        if tiers:
+            keep &= summary['preferred_tier'].isin(tiers).to_numpy()
+        rows = np.flatnonzero(keep)
+        values = summary[sort_by].to_numpy()[rows]
+        if descending:
+            # 按取值的名次取负，降序时取值相同的买家仍保持原来的顺序
+            values = -np.unique(values, return_inverse=True)[1]
+        order = rows[values.argsort(kind='stable')]
+
+        col1, col2 = st.columns(2)
+        page_size = col1.selectbox("Buyers per page", PAGE_SIZES, key=f'{key}_page_size')
+        pages = max(-(-len(order) // page_size), 1)
+        # 筛选后页数变少时回到最后一页
+        page_key = f'{key}_page'
+        if st.session_state.get(page_key, 1) > pages:
+            st.session_state[page_key] = pages
+        page = col2.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+        start = (page - 1) * page_size
+        visible = order[start:start + page_size]
+        dataframe(summary.iloc[visible].rename(columns=BUYER_SUMMARY_COLUMNS).round(2), hide_index=True)
+        if len(visible):
+            st.caption(f"Page {page:,} of {pages:,}: buyers {start + 1:,}-{start + len(visible):,} of {len(order):,}"
+                       + (f" (filtered from {len(summary):,})" if len(order) < len(summary) else ""))
+        else:
+            st.caption(f"No buyers match the filters (of {len(summary):,})")
+
+
+# 对比页预算使用率图下方的说明
+UTILIZATION_NOTE = ("The Experiment page allows several purchases per round and does not deduct them from the "
+                    "budget, so participant utilization counts only each participant's first purchase in a round "
+                    "(price / round budget), the same as simulated buyers, who buy at most one house per round.")
+
+
+# 真实参与者与模拟买家的图表并排对比（各自按结果指纹缓存）
+# 参与者的预算使用率只计每轮第一次购买，与模拟买家的口径相同
+def show_cohort_comparison(participants, simulated):
+    left = cached_figures(participants.fingerprint(), participants, first_purchase=True) \
+        if participants.rows else None
+    right = cached_figures(simulated.fingerprint(), simulated)
+    sections = [
+        ("Tier Distribution by Round", 'tier'),
+        ("Property Type Distribution by Round", 'type'),
+        ("Budget Utilization", 'utilization'),
+        ("Price Trends", 'price_trend'),
+        ("Price Distribution by Round", 'price_box'),
+    ]
+    for title, key in sections:
+        st.write(f"### {title}")
+        col1, col2 = st.columns(2)
+        with col1:
+            if left is None:
+                st.info("No purchases from completed sessions yet")
+            else:
+                plotly_chart(left[key], use_container_width=True)
+        with col2:
+            plotly_chart(right[key], use_container_width=True)
+        if key == 'utilization':
+            st.caption(UTILIZATION_NOTE)
+
+
+# 侧边栏性能面板：勾选后记录本会话每次重跑中各阶段的耗时、调用次数和处理行数
+# 未勾选时不激活 Profiler，埋点几乎没有开销
+@contextlib.contextmanager
+def profiled_run(page):
+    if not st.sidebar.checkbox("Profiling", key='profiling_enabled',
+                               help="Record per-stage timings for this session"):
+        yield None
+        return
+
+    if 'profiler' not in st.session_state:
+        st.session_state.profiler = Profiler()
+    profiler = st.session_state.profiler
+    try:
+        with profiler.activate(), stage(f'{page}.run'):
+            yield profiler
+    except BaseException as exc:
+        # st.rerun() 通过异常中止本次运行，记下由哪个页面触发
+        if type(exc).__name__ == 'RerunException':
+            profiler.count(f'{page}.rerun_requested')
+        raise
+    show_profiling_panel(profiler, page)
+
+
+def show_profiling_panel(profiler, page):
+    import pandas as pd
+
+    with st.sidebar.expander("Profiling", expanded=True):
+        last_run = profiler.stages.get(f'{page}.run')
+        if last_run is not None:
+            st.caption(f"Last run: {last_run['last'] * 1000:.1f} ms · {last_run['calls']} runs recorded")
+        summary = pd.DataFrame(profiler.summary(), columns=['stage', 'calls', 'total_ms', 'mean_ms',
+                                                            'last_ms', 'rows'])
+        st.dataframe(summary.round(2), hide_index=True)
+        if profiler.counters:
+            st.write({name: value for name, value in sorted(profiler.counters.items())})
+        st.download_button("Download JSON trace", profiler.to_json(), file_name=f'{page}_trace.json',
+                           mime='application/json')
+        st.button("Reset profiling", on_click=profiler.reset)
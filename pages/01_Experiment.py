@@ -2,6 +2,10 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 
+from house_sim import events, shuffled_order
+from house_sim.profiling import stage
+from house_sim.ui import compact_indices, fragment, log_event, profiled_run, rerun_app, shared_catalog
+
 # 设置页面配置
 st.set_page_config(
     page_title="House Buying Experiment",
@@ -10,6 +14,7 @@ st.set_page_config(
 )
 
 # 初始化会话状态
+# 房源都用共享目录中的下标表示：有序历史是下标列表，成员判断用下标集合
 if 'current_round' not in st.session_state:
     st.session_state.current_round = 1
 if 'budget' not in st.session_state:
@@ -17,33 +22,93 @@ if 'budget' not in st.session_state:
 if 'current_house_index' not in st.session_state:
     st.session_state.current_house_index = 0
 if 'purchased_houses' not in st.session_state:
-    st.session_state.purchased_houses = []
-if 'available_houses' not in st.session_state:
-    st.session_state.available_houses = None
+    st.session_state.purchased_houses = []  # (目录下标, 轮次)
+if 'purchased_set' not in st.session_state:
+    st.session_state.purchased_set = set()
+if 'house_order' not in st.session_state:
+    st.session_state.house_order = None
 if 'viewed_houses' not in st.session_state:
     st.session_state.viewed_houses = []
+if 'viewed_set' not in st.session_state:
+    st.session_state.viewed_set = set()
 if 'viewed_benchmarks' not in st.session_state:
-    st.session_state.viewed_benchmarks = []
+    st.session_state.viewed_benchmarks = set()
+if 'purchase_tables' not in st.session_state:
+    st.session_state.purchase_tables = {}  # 轮次 -> 购买记录表，购买时逐行追加
+if 'seed' not in st.session_state:
+    st.session_state.seed = np.random.SeedSequence().entropy
+if 'session_id' not in st.session_state:
+    # 参与者的每个操作都追加到事件日志，会话结束后仍可回放和导出
+    log_event(events.SESSION_START, round=1, budget=st.session_state.budget, seed=st.session_state.seed)
+
+# 按钮都通过 on_click 回调修改会话状态：回调在重跑开始前执行，
+# 本次重跑直接显示更新后的页面，不再需要 st.rerun() 再整页运行一次
+
+# 记录已查看的房源（每轮每个房源只记录一次）
+def mark_viewed(index):
+    if index not in st.session_state.viewed_set:
+        st.session_state.viewed_set.add(index)
+        st.session_state.viewed_houses.append(index)
+        log_house_event(events.VIEW, index)
+
+# 记录与某个房源相关的事件
+def log_house_event(event, index, **data):
+    catalog = shared_catalog()
+    log_event(event, round=st.session_state.current_round, house_id=catalog.id[index],
+              price=catalog.price[index], budget=st.session_state.budget, **data)
+
+def view_benchmark(index):
+    st.session_state.viewed_benchmarks.add(index)
+    log_house_event(events.BENCHMARK, index)
 
-# 创建示例房产数据
-def create_house_data():
-    houses = [
-        # Value tier
-        {"id": 1, "price": 90, "tier": "Value", "type": "Location", "features": "Basic location", "benchmark": 85},
-        {"id": 2, "price": 100, "tier": "Value", "type": "Property", "features": "Standard features", "benchmark": None},
-        # Median tier
-        {"id": 3, "price": 115, "tier": "Median", "type": "Location", "features": "Commercial area", "benchmark": 110},
-        {"id": 4, "price": 115, "tier": "Median", "type": "Property", "features": "Larger space", "benchmark": None},
-        {"id": 5, "price": 125, "tier": "Median", "type": "Location", "features": "Business zone", "benchmark": 120},
-        {"id": 6, "price": 125, "tier": "Median", "type": "Property", "features": "Modern amenities", "benchmark": None},
-        # Premium tier
-        {"id": 7, "price": 140, "tier": "Premium", "type": "Location", "features": "School district", "benchmark": 135},
-        {"id": 8, "price": 140, "tier": "Premium", "type": "Property", "features": "Functional backyard", "benchmark": None}
-    ]
-    return pd.DataFrame(houses)
+# 购买房源；预算不足时不做任何修改，由按钮所在的卡片显示错误
+def purchase_house(index, is_current):
+    catalog = shared_catalog()
+    if catalog.price[index] > st.session_state.budget:
+        log_house_event(events.PURCHASE_FAILED, index, current=is_current)
+        return
+    round_num = st.session_state.current_round
+    st.session_state.purchased_houses.append((index, round_num))
+    st.session_state.purchased_set.add(index)
+    # 只给本轮的购买记录表追加一行，不从全部购买记录重建
+    row = catalog.to_frame([index])[['id', 'price', 'tier', 'type']]
+    row['round'] = round_num
+    # 美化列名
+    row.columns = ['House ID', 'Price ($)', 'Tier', 'Type', 'Round']
+    tables = st.session_state.purchase_tables
+    tables[round_num] = row if round_num not in tables else pd.concat([tables[round_num], row],
+                                                                        ignore_index=True)
+    if is_current:
+        st.session_state.current_house_index += 1
+    st.session_state.pending_purchase = index
+    log_house_event(events.PURCHASE, index, current=is_current)
 
-# 显示单个房源
-def display_house(house, is_current=False):
+def skip_house(index):
+    # 将当前房源添加到已查看列表，移动到下一个房源
+    mark_viewed(index)
+    st.session_state.current_house_index += 1
+    log_house_event(events.SKIP, index)
+
+def next_round():
+    if st.session_state.current_round < 3:
+        st.session_state.current_round += 1
+        st.session_state.budget = 150
+        st.session_state.current_house_index = 0
+        st.session_state.house_order = None
+        st.session_state.viewed_houses = []
+        st.session_state.viewed_set = set()
+        st.session_state.viewed_benchmarks = set()
+        log_event(events.ROUND, round=st.session_state.current_round, budget=st.session_state.budget)
+    elif not st.session_state.get('experiment_completed'):
+        st.session_state.experiment_completed = True
+        log_event(events.COMPLETE, round=st.session_state.current_round,
+                  purchases=len(st.session_state.purchased_houses))
+
+# 显示单个房源（index 为共享目录中的下标）
+# 房源卡片是一个片段：支持片段的 Streamlit 上查看 benchmark 只重跑这张卡片
+@fragment
+def display_house(catalog, index, is_current=False):
+    house = catalog.record(index)
     col1, col2 = st.columns([3, 1])
     
     with col1:
@@ -54,85 +119,67 @@ def display_house(house, is_current=False):
         st.write(f"**Price:** ${house['price']}")
         
         # 如果是Location类型且已查看benchmark，显示benchmark
-        if house['type'] == 'Location' and house['id'] in st.session_state.viewed_benchmarks:
+        if house['type'] == 'Location' and index in st.session_state.viewed_benchmarks:
             st.write(f"**Benchmark:** ${house['benchmark']}")
     
     with col2:
         # 如果是Location类型且未查看benchmark，显示View Benchmark按钮
-        if house['type'] == 'Location' and house['id'] not in st.session_state.viewed_benchmarks:
-            if st.button(f"View Benchmark (House {house['id']})", 
-                        key=f"benchmark_{house['id']}_{is_current}"):
-                st.session_state.viewed_benchmarks.append(house['id'])
-                st.experimental_rerun()
+        if house['type'] == 'Location' and index not in st.session_state.viewed_benchmarks:
+            st.button(f"View Benchmark (House {house['id']})", 
+                      key=f"benchmark_{house['id']}_{is_current}", on_click=view_benchmark, args=(index,))
         
-        # 如果房子未被购买，显示Purchase按钮
-        if house['id'] not in [h['id'] for h in st.session_state.purchased_houses]:
+        # 如果房子未被购买，显示Purchase按钮（购买成功后按钮不再显示）
+        if index not in st.session_state.purchased_set:
             if st.button(f"Purchase House {house['id']}", 
-                        key=f"purchase_{house['id']}_{is_current}"):
-                if house['price'] <= st.session_state.budget:
-                    st.session_state.purchased_houses.append({
-                        'id': house['id'],
-                        'price': house['price'],
-                        'tier': house['tier'],
-                        'type': house['type'],
-                        'round': st.session_state.current_round
-                    })
-                    st.success(f"Successfully purchased House {house['id']}!")
-                    if is_current:
-                        st.session_state.current_house_index += 1
-                        st.experimental_rerun()
-                else:
-                    st.error("Insufficient budget!")
+                        key=f"purchase_{house['id']}_{is_current}",
+                        on_click=purchase_house, args=(index, is_current)):
+                st.error("Insufficient budget!")
+        elif st.session_state.get('pending_purchase') == index:
+            # 片段内的购买还要更新侧边栏、当前房源和购买记录：转为整页重跑
+            rerun_app()
+        elif st.session_state.get('purchase_message') == index:
+            st.success(f"Successfully purchased House {house['id']}!")
 
 # 显示当前房产和历史房源
 def display_houses():
-    if st.session_state.available_houses is None:
-        houses_df = create_house_data()
-        # 随机打乱房源顺序
-        st.session_state.available_houses = houses_df.sample(frac=1).reset_index(drop=True)
+    # 房源目录在所有会话之间共享，会话里只保存本轮的展示顺序（目录下标）
+    catalog = shared_catalog()
+    if st.session_state.house_order is None:
+        with stage('experiment.shuffle'):
+            # 随机打乱房源顺序（每个会话、每轮使用由会话种子派生的随机流）
+            rng = np.random.default_rng([st.session_state.seed, st.session_state.current_round])
+            st.session_state.house_order = compact_indices(shuffled_order(rng, len(catalog)), len(catalog))
+    house_order = st.session_state.house_order
+    # 购买成功的提示只在购买后的这一次整页运行中显示
+    st.session_state.purchase_message = st.session_state.pop('pending_purchase', None)
     
     # 显示当前房源
-    if st.session_state.current_house_index < len(st.session_state.available_houses):
+    if st.session_state.current_house_index < len(house_order):
         st.write("## Current House")
-        current_house = st.session_state.available_houses.iloc[st.session_state.current_house_index]
-        display_house(current_house, is_current=True)
+        current_index = int(house_order[st.session_state.current_house_index])
+        display_house(catalog, current_index, is_current=True)
         
         # 添加Skip按钮
-        if st.button("Skip Current House", key=f"skip_{st.session_state.current_house_index}"):
-            # 将当前房源添加到已查看列表
-            if current_house['id'] not in [h['id'] for h in st.session_state.viewed_houses]:
-                st.session_state.viewed_houses.append(current_house.to_dict())
-            # 移动到下一个房源
-            st.session_state.current_house_index += 1
-            st.experimental_rerun()
+        st.button("Skip Current House", key=f"skip_{st.session_state.current_house_index}",
+                  on_click=skip_house, args=(current_index,))
         
         # 将当前房源添加到已查看列表（如果还没有添加）
-        if current_house['id'] not in [h['id'] for h in st.session_state.viewed_houses]:
-            st.session_state.viewed_houses.append(current_house.to_dict())
+        mark_viewed(current_index)
     
     # 如果已经看完所有房源，显示Next Round按钮
-    if st.session_state.current_house_index >= len(st.session_state.available_houses):
+    if st.session_state.current_house_index >= len(house_order):
         st.write("### No more houses available in this round")
-        if st.button("Next Round", key=f"next_round_{st.session_state.current_round}"):
-            if st.session_state.current_round < 3:
-                st.session_state.current_round += 1
-                st.session_state.budget = 150
-                st.session_state.current_house_index = 0
-                st.session_state.available_houses = None
-                st.session_state.viewed_houses = []
-                st.session_state.viewed_benchmarks = []
-                st.experimental_rerun()
-            else:
-                st.success("Experiment completed! You can now view the simulation results.")
-                st.session_state.experiment_completed = True
+        st.button("Next Round", key=f"next_round_{st.session_state.current_round}", on_click=next_round)
+        if st.session_state.get('experiment_completed'):
+            st.success("Experiment completed! You can now view the simulation results.")
     
     # 显示历史房源（不包括当前房源）
     if len(st.session_state.viewed_houses) > 1:  # 如果有多于一个已查看的房源
         st.write("## Previously Viewed Houses")
         # 显示除了当前房源之外的所有历史房源
-        for house in st.session_state.viewed_houses[:-1]:
+        for index in st.session_state.viewed_houses[:-1]:
             st.write("---")
-            display_house(house)
+            display_house(catalog, index)
 
 # 主界面
 def main():
@@ -158,23 +205,26 @@ def main():
         """)
     
     # 显示房产
-    display_houses()
+    with stage('experiment.display_houses'):
+        display_houses()
     
     # 显示每轮的购买记录
+    with stage('experiment.history', rows=len(st.session_state.purchased_houses)):
+        show_purchase_history()
+
+# 显示每轮的购买记录（表格在购买时已经增量更新，这里只负责显示）
+@fragment
+def show_purchase_history():
     if st.session_state.purchased_houses:
         st.write("### Your Purchase History")
         for round_num in range(1, st.session_state.current_round + 1):
-            round_purchases = [p for p in st.session_state.purchased_houses if p['round'] == round_num]
-            if round_purchases:
+            table = st.session_state.purchase_tables.get(round_num)
+            if table is not None:
                 st.write(f"#### Round {round_num} Purchases")
-                df = pd.DataFrame(round_purchases)
-                # 重新排列列的顺序
-                df = df[['id', 'price', 'tier', 'type', 'round']]
-                # 美化列名
-                df.columns = ['House ID', 'Price ($)', 'Tier', 'Type', 'Round']
-                st.dataframe(df, hide_index=True)
+                st.dataframe(table, hide_index=True)
             else:
                 st.write(f"#### Round {round_num}: No purchases made")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    with profiled_run('experiment'):
+        main() 
\ No newline at end of file
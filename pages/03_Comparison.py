@@ -0,0 +1,52 @@
+import streamlit as st
+
+from house_sim.ui import cohort_view, event_log, profiled_run, show_cohort_comparison, simulated_cohort
+
+# 设置页面配置
+st.set_page_config(
+    page_title="Participants vs Simulation",
+    page_icon="🏠",
+    layout="wide"
+)
+
+# 主界面
+def main():
+    st.title("Participants vs Simulation")
+
+    with st.expander("About This Comparison", expanded=False):
+        st.write("""
+        - Left: participants who completed all 3 rounds of the Experiment page
+        - Right: simulated buyers choosing at random from the same houses and budgets
+        - Participant results update as sessions complete; only new events are read on each load
+        """)
+
+    # 事件写入失败时会自动重试，这里提示还有多少事件没有写入（对比中暂时不包含它们）
+    log = event_log()
+    if log.unwritten:
+        st.warning(f"{log.unwritten:,} participant events could not be written to the event log yet "
+                   f"({log.error}); they are retried automatically")
+
+    # 只处理上次加载之后的新事件
+    view = cohort_view()
+    view.refresh()
+    participants = view.results
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Completed sessions", f"{view.sessions:,}")
+    col2.metric("Sessions in progress", f"{len(view.pending):,}")
+    col3.metric("Participant purchases", f"{participants.rows:,}")
+
+    # 模拟参数
+    col1, col2 = st.columns(2)
+    num_buyers = col1.number_input("Simulated buyers", min_value=1, max_value=1_000_000, value=1000, step=100)
+    seed = col2.number_input("Seed", min_value=0, value=42, step=1)
+    simulated = simulated_cohort(int(num_buyers), int(seed))
+
+    col1, col2 = st.columns(2)
+    col1.write("## Participants")
+    col2.write("## Simulated Buyers")
+    show_cohort_comparison(participants, simulated)
+
+if __name__ == "__main__":
+    with profiled_run('comparison'):
+        main()